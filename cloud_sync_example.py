@@ -7,28 +7,39 @@ Demonstrates how to use FixtureGPT with cloud sync to the SaaS dashboard.
 import os
 import time
 import random
-from fixturegpt import snapshot, configure_cloud_sync
+import asyncio
+from fixturegpt import snapshot_async, configure_cloud_sync, prefetch_fixtures, set_mode
 
-def simulate_openai_call(prompt: str, model: str = "gpt-4"):
+_RESPONSES = {
+    "What is Python?": "Python is a high-level, interpreted programming language known for its simplicity and readability.",
+    "Explain machine learning": "Machine learning is a subset of AI that enables computers to learn and improve from experience without being explicitly programmed.",
+    "How does RAG work?": "RAG (Retrieval-Augmented Generation) combines information retrieval with text generation to provide more accurate and contextual responses."
+}
+
+# Chat completion ids, computed once per distinct prompt
+_id_cache = {}
+
+def _chat_id(prompt: str) -> str:
+    """Return the fake completion id for a prompt."""
+    chat_id = _id_cache.get(prompt)
+    if chat_id is None:
+        chat_id = _id_cache[prompt] = f"chatcmpl-{hash(prompt) % 10000}"
+    return chat_id
+
+async def simulate_openai_call(prompt: str, model: str = "gpt-4"):
     """Simulate an expensive OpenAI API call."""
     print(f"🤖 [OpenAI] Calling {model} with prompt: '{prompt[:50]}...'")
-    time.sleep(0.5)  # Simulate API latency
-    
-    responses = {
-        "What is Python?": "Python is a high-level, interpreted programming language known for its simplicity and readability.",
-        "Explain machine learning": "Machine learning is a subset of AI that enables computers to learn and improve from experience without being explicitly programmed.",
-        "How does RAG work?": "RAG (Retrieval-Augmented Generation) combines information retrieval with text generation to provide more accurate and contextual responses."
-    }
+    await asyncio.sleep(0.5)  # Simulate API latency
     
     return {
-        "id": f"chatcmpl-{hash(prompt) % 10000}",
+        "id": _chat_id(prompt),
         "object": "chat.completion",
         "model": model,
         "choices": [{
             "index": 0,
             "message": {
                 "role": "assistant",
-                "content": responses.get(prompt, f"This is a response to: {prompt}")
+                "content": _RESPONSES.get(prompt) or f"This is a response to: {prompt}"
             },
             "finish_reason": "stop"
         }],
@@ -39,22 +50,28 @@ def simulate_openai_call(prompt: str, model: str = "gpt-4"):
         }
     }
 
-def simulate_vector_search(query: str, collection: str = "documents", top_k: int = 5):
+async def simulate_vector_search(query: str, collection: str = "documents", top_k: int = 5):
     """Simulate an expensive vector search operation."""
     print(f"🔍 [VectorDB] Searching '{query}' in {collection} (top {top_k})")
-    time.sleep(0.3)  # Simulate search latency
+    await asyncio.sleep(0.3)  # Simulate search latency
     
     # Simulate search results
-    results = []
-    for i in range(top_k):
-        results.append({
+    return [
+        {
             "id": f"doc_{i}",
             "score": 0.95 - (i * 0.1),
             "text": f"Document {i} about {query}. This contains relevant information about the topic.",
             "metadata": {"source": f"source_{i}.pdf", "page": i + 1}
-        })
-    
-    return results
+        }
+        for i in range(top_k)
+    ]
+
+async def _run_pipeline():
+    """Run the independent LLM and vector search calls concurrently."""
+    return await asyncio.gather(
+        snapshot_async("cloud_openai_test", simulate_openai_call, "What is Python?"),
+        snapshot_async("cloud_vector_test", simulate_vector_search, "machine learning", top_k=3),
+    )
 
 def demo_cloud_sync():
     """Demonstrate cloud sync functionality."""
@@ -82,27 +99,25 @@ def demo_cloud_sync():
     configure_cloud_sync(demo_api_key, 'both')
     
     # Set to record mode
-    os.environ["FIXTUREGPT_MODE"] = "record"
+    set_mode("record")
     
     print("\n🔴 Step 2: Recording with Cloud Sync")
     print("Recording fixtures locally AND syncing to cloud dashboard...")
     
-    # Record some expensive operations
-    result1 = snapshot("cloud_openai_test", simulate_openai_call, "What is Python?")
+    # Record some expensive operations concurrently
+    result1, result2 = asyncio.run(_run_pipeline())
     print(f"✅ Result: {result1['choices'][0]['message']['content'][:60]}...")
-    
-    result2 = snapshot("cloud_vector_test", simulate_vector_search, "machine learning", top_k=3)
     print(f"✅ Found {len(result2)} documents")
     
     # Switch to replay mode
     print("\n📼 Step 3: Replaying from Cloud")
-    os.environ["FIXTUREGPT_MODE"] = "replay"
+    set_mode("replay")
+    prefetch_fixtures(["cloud_openai_test", "cloud_vector_test"])
     
     # These should replay from local cache (fastest)
     print("Replaying from local cache...")
     start_time = time.time()
-    result3 = snapshot("cloud_openai_test", simulate_openai_call, "What is Python?")
-    result4 = snapshot("cloud_vector_test", simulate_vector_search, "machine learning", top_k=3)
+    result3, result4 = asyncio.run(_run_pipeline())
     end_time = time.time()
     
     print(f"⚡ Local replay completed in {end_time - start_time:.3f}s")
@@ -116,11 +131,11 @@ def demo_cloud_sync():
     
     # This would try to load from cloud (will fail with demo key)
     try:
-        result5 = snapshot("cloud_only_test", simulate_openai_call, "How does RAG work?")
+        result5 = asyncio.run(snapshot_async("cloud_only_test", simulate_openai_call, "How does RAG work?"))
         print(f"✅ Cloud result: {result5['choices'][0]['message']['content'][:60]}...")
     except Exception as e:
         print(f"⚠️  Cloud sync failed (expected with demo key): Will fall back to live call")
-        result5 = snapshot("cloud_only_test", simulate_openai_call, "How does RAG work?")
+        result5 = asyncio.run(snapshot_async("cloud_only_test", simulate_openai_call, "How does RAG work?"))
         print(f"✅ Fallback result: {result5['choices'][0]['message']['content'][:60]}...")
 
 def demo_team_collaboration():
@@ -3,37 +3,46 @@
 FixtureGPT Demo - Complete demonstration of all features
 """
 
-import os
 import sys
 import time
-import subprocess
 from pathlib import Path
 
 # Add the current directory to Python path so we can import fixturegpt
 sys.path.insert(0, str(Path(__file__).parent))
 
-from fixturegpt import snapshot
+from fixturegpt import snapshot, prefetch_fixtures, set_mode
+from fixturegpt.cli import stats, diff
+
+_RESPONSES = {
+    "What is Python?": "Python is a high-level, interpreted programming language known for its simplicity and readability.",
+    "Explain machine learning": "Machine learning is a subset of AI that enables computers to learn and improve from experience without being explicitly programmed.",
+    "How does RAG work?": "RAG (Retrieval-Augmented Generation) combines information retrieval with text generation to provide more accurate and contextual responses."
+}
+
+# Chat completion ids, computed once per distinct prompt
+_id_cache = {}
+
+def _chat_id(prompt: str) -> str:
+    """Return the fake completion id for a prompt."""
+    chat_id = _id_cache.get(prompt)
+    if chat_id is None:
+        chat_id = _id_cache[prompt] = f"chatcmpl-{hash(prompt) % 10000}"
+    return chat_id
 
 def simulate_openai_call(prompt: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7):
     """Simulate an expensive OpenAI API call."""
     print(f"🤖 [OpenAI] Calling {model} with prompt: '{prompt[:50]}...'")
     time.sleep(0.8)  # Simulate API latency
     
-    responses = {
-        "What is Python?": "Python is a high-level, interpreted programming language known for its simplicity and readability.",
-        "Explain machine learning": "Machine learning is a subset of AI that enables computers to learn and improve from experience without being explicitly programmed.",
-        "How does RAG work?": "RAG (Retrieval-Augmented Generation) combines information retrieval with text generation to provide more accurate and contextual responses."
-    }
-    
     return {
-        "id": f"chatcmpl-{hash(prompt) % 10000}",
+        "id": _chat_id(prompt),
         "object": "chat.completion",
         "model": model,
         "choices": [{
             "index": 0,
             "message": {
                 "role": "assistant",
-                "content": responses.get(prompt, f"This is a response to: {prompt}")
+                "content": _RESPONSES.get(prompt) or f"This is a response to: {prompt}"
             },
             "finish_reason": "stop"
         }],
@@ -82,7 +91,7 @@ def demo_basic_usage():
     print("="*60)
     
     # Set to record mode
-    os.environ["FIXTUREGPT_MODE"] = "record"
+    set_mode("record")
     print("📝 Mode: RECORD - Will call actual functions and save results")
     
     # Record some expensive operations
@@ -94,7 +103,8 @@ def demo_basic_usage():
     
     # Switch to replay mode
     print("\n🔄 Switching to REPLAY mode...")
-    os.environ["FIXTUREGPT_MODE"] = "replay"
+    set_mode("replay")
+    prefetch_fixtures(["openai_python", "vector_search_ml"])
     
     # Same calls should now use cached results (much faster!)
     start_time = time.time()
@@ -111,7 +121,7 @@ def demo_rag_pipeline():
     print("🔍 DEMO 2: RAG Pipeline with FixtureGPT")
     print("="*60)
     
-    os.environ["FIXTUREGPT_MODE"] = "record"
+    set_mode("record")
     
     query = "Explain machine learning"
     
@@ -126,7 +136,8 @@ def demo_rag_pipeline():
     
     # Step 3: Now replay the entire pipeline instantly
     print("\n🔄 Replaying RAG pipeline...")
-    os.environ["FIXTUREGPT_MODE"] = "replay"
+    set_mode("replay")
+    prefetch_fixtures(["rag_search", "rag_generate"])
     
     start_time = time.time()
     cached_docs = snapshot("rag_search", simulate_vector_search, query, "knowledge_base", 5)
@@ -142,10 +153,10 @@ def demo_cli_features():
     print("="*60)
     
     print("📊 Fixture Statistics:")
-    subprocess.run([sys.executable, "-m", "fixturegpt.cli", "stats"])
+    stats()
     
     print("\n🔍 Fixture Details for 'openai_python':")
-    subprocess.run([sys.executable, "-m", "fixturegpt.cli", "diff", "openai_python"])
+    diff("openai_python")
 
 def demo_advanced_scenarios():
     """Demo 4: Advanced scenarios and edge cases."""
@@ -153,7 +164,7 @@ def demo_advanced_scenarios():
     print("🚀 DEMO 4: Advanced Scenarios")
     print("="*60)
     
-    os.environ["FIXTUREGPT_MODE"] = "record"
+    set_mode("record")
     
     # Scenario 1: Complex data structures
     complex_data = [{"id": i, "value": f"item_{i}"} for i in range(100)]
@@ -165,7 +176,7 @@ def demo_advanced_scenarios():
     print(f"📄 Found {len(result)} research papers")
     
     # Scenario 3: Fallback behavior (no fixture exists)
-    os.environ["FIXTUREGPT_MODE"] = "replay"
+    set_mode("replay")
     result = snapshot("new_query", simulate_openai_call, "How does RAG work?")
     print(f"🔄 Fallback worked: {result['choices'][0]['message']['content'][:60]}...")
 
@@ -191,7 +202,7 @@ def main():
     print("="*60)
     print("🎯 Key Features Demonstrated:")
     print("  • ✅ Record/Replay expensive function calls")
-    print("  • ✅ SHA256 hashing for deduplication")
+    print("  • ✅ BLAKE3 hashing for deduplication")
     print("  • ✅ JSON serialization with graceful fallbacks")
     print("  • ✅ CLI tools for stats and debugging")
     print("  • ✅ Cost estimation for LLM calls")
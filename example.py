@@ -1,30 +1,29 @@
 """Example usage of FixtureGPT."""
 
-import os
 import time
 import random
-from fixturegpt import snapshot
+from fixturegpt import snapshot, prefetch_fixtures, set_mode
 
 # Set to record mode first
-os.environ["FIXTUREGPT_MODE"] = "record"
+set_mode("record")
+
+# Simulated responses, formatted with the prompt
+_RESPONSE_TEMPLATES = (
+    "Response to '{prompt}': This is a helpful answer about your query.",
+    "Regarding '{prompt}': Here's what I think about that topic.",
+    "About '{prompt}': Let me provide you with detailed information."
+)
 
 def expensive_llm_call(prompt: str, model: str = "gpt-3.5-turbo"):
     """Simulate an expensive LLM API call."""
     print(f"🔥 Making expensive API call for: '{prompt}'")
     time.sleep(1)  # Simulate network delay
     
-    # Simulate different responses
-    responses = [
-        f"Response to '{prompt}': This is a helpful answer about your query.",
-        f"Regarding '{prompt}': Here's what I think about that topic.",
-        f"About '{prompt}': Let me provide you with detailed information."
-    ]
-    
     return {
         "model": model,
         "choices": [{
             "message": {
-                "content": random.choice(responses)
+                "content": random.choice(_RESPONSE_TEMPLATES).format(prompt=prompt)
             }
         }],
         "usage": {
@@ -60,7 +59,8 @@ def main():
     
     # Example 3: Same call again (should use cache in replay mode)
     print("\n🔄 Example 3: Repeated Call")
-    os.environ["FIXTUREGPT_MODE"] = "replay"
+    set_mode("replay")
+    prefetch_fixtures(["user_question"])
     result2 = snapshot("user_question", expensive_llm_call, "What is Python?")
     print(f"Result: {result2['choices'][0]['message']['content'][:50]}...")
     
@@ -1,6 +1,28 @@
 """FixtureGPT - Record and replay expensive or variable outputs for AI/LLM development."""
 
-from .main import snapshot, configure_cloud_sync
+from .main import (
+    snapshot,
+    snapshot_async,
+    configure_cloud_sync,
+    cloud_config,
+    flush_cloud_sync,
+    prefetch_fixtures,
+    record_session,
+    refresh_config,
+    set_mode,
+    use_mode,
+)
 
 __version__ = "0.1.1"
-__all__ = ["snapshot", "configure_cloud_sync"] 
\ No newline at end of file
+__all__ = [
+    "snapshot",
+    "snapshot_async",
+    "configure_cloud_sync",
+    "cloud_config",
+    "flush_cloud_sync",
+    "prefetch_fixtures",
+    "record_session",
+    "refresh_config",
+    "set_mode",
+    "use_mode",
+] 
\ No newline at end of file
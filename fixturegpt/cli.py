@@ -3,11 +3,13 @@
 import os
 import typer
 import json
-from typing import Optional
+import orjson
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
-from .main import get_fixture_stats, diff_fixture
+from .main import get_fixture_stats, diff_fixture, clear_fixture_cache
 
 app = typer.Typer(
     name="fixturegpt",
@@ -15,6 +17,44 @@ app = typer.Typer(
 )
 console = Console()
 
+# Column specs for the fixture details table, shared across ``stats`` calls.
+_FIXTURE_COLUMNS = (
+    ("Name", {"style": "cyan"}),
+    ("Filename", {"style": "magenta"}),
+    ("Size", {"justify": "right", "style": "green"}),
+    ("Timestamp", {"style": "dim"}),
+)
+
+
+def _default(obj: Any) -> Any:
+    """Convert types orjson can't serialize natively into JSON-friendly values."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return bytes(obj).decode("utf-8", errors="replace")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+def _to_json(obj: Any) -> bytes:
+    """Pretty-print an object as JSON bytes, falling back to stdlib json for objects orjson refuses."""
+    try:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return json.dumps(obj, indent=2, default=_default).encode()
+
+
+def _fixture_rows(fixtures: List[Dict[str, Any]]) -> Iterator[Tuple[str, str, str, str]]:
+    """Yield one formatted table row per fixture."""
+    for fixture in fixtures:
+        yield (
+            fixture["name"],
+            fixture["filename"],
+            format(fixture["size"] / 1024, ".1f") + " KB",
+            fixture["timestamp"][:19]  # "unknown" is shorter than 19 chars
+        )
+
 
 @app.command()
 def stats():
@@ -58,19 +98,11 @@ def stats():
     
     # Create table of fixtures
     table = Table(title="Local Fixture Details")
-    table.add_column("Name", style="cyan")
-    table.add_column("Filename", style="magenta")
-    table.add_column("Size", justify="right", style="green")
-    table.add_column("Timestamp", style="dim")
-    
-    for fixture in stats_data["fixtures"]:
-        size_kb = fixture["size"] / 1024
-        table.add_row(
-            fixture["name"],
-            fixture["filename"],
-            f"{size_kb:.1f} KB",
-            fixture["timestamp"][:19] if fixture["timestamp"] != "unknown" else "unknown"
-        )
+    for header, column_options in _FIXTURE_COLUMNS:
+        table.add_column(header, **column_options)
+    
+    for row in _fixture_rows(stats_data["fixtures"]):
+        table.add_row(*row)
     
     console.print(table)
     
@@ -140,16 +172,18 @@ def diff(name: str):
         # Show args and kwargs
         if fixture.get("args"):
             console.print("📥 Args:")
-            console.print(json.dumps(fixture["args"], indent=2, default=str))
+            console.print(_to_json(fixture["args"]).decode())
         
         if fixture.get("kwargs"):
             console.print("🔧 Kwargs:")
-            console.print(json.dumps(fixture["kwargs"], indent=2, default=str))
+            console.print(_to_json(fixture["kwargs"]).decode())
         
         # Show original response (truncated if too long)
-        response_str = json.dumps(fixture["original_response"], indent=2, default=str)
-        if len(response_str) > 500:
-            response_str = response_str[:500] + "..."
+        response_json = _to_json(fixture["original_response"])
+        if len(response_json) > 500:
+            response_str = response_json[:500].decode(errors="ignore") + "..."
+        else:
+            response_str = response_json.decode()
         
         console.print("📤 Original Response:")
         console.print(response_str)
@@ -168,6 +202,7 @@ def clear():
         confirm = typer.confirm("Are you sure you want to delete all fixtures?")
         if confirm:
             shutil.rmtree(fixtures_dir)
+            clear_fixture_cache()
             console.print("🗑️  All fixtures cleared!", style="green")
         else:
             console.print("❌ Operation cancelled", style="yellow")
@@ -175,5 +210,27 @@ def clear():
         console.print("📭 No fixtures directory found", style="yellow")
 
 
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the CLI in-process.
+    
+    Output goes to whatever sys.stdout is at call time, so callers can capture
+    it with contextlib.redirect_stdout().
+    
+    Args:
+        argv: Command-line arguments, e.g. ["stats"] (default: sys.argv[1:])
+    
+    Returns:
+        The exit code the command would have exited with
+    """
+    try:
+        app(args=argv, prog_name="fixturegpt")
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        return 1
+    return 0
+
+
 if __name__ == "__main__":
-    app() 
\ No newline at end of file
+    raise SystemExit(main()) 
\ No newline at end of file
@@ -1,119 +1,523 @@
 """Core FixtureGPT functionality for recording and replaying function outputs."""
 
 import os
+import sys
 import json
+import math
+import logging
+import mmap
+import atexit
+import asyncio
 import hashlib
+import pickle
+import struct
+import inspect
 import functools
+import contextlib
+import threading
+import contextvars
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import Any, Callable, Dict, Optional, Tuple
+from typing import Any, BinaryIO, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple, Union
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from enum import Enum
 
-# Cloud sync configuration
-FIXTUREGPT_API_KEY = os.getenv('FIXTUREGPT_API_KEY')
-FIXTUREGPT_SYNC_MODE = os.getenv('FIXTUREGPT_SYNC_MODE', 'local')  # local, cloud, both
-FIXTUREGPT_API_URL = os.getenv('FIXTUREGPT_API_URL', 'https://app.fixturegpt.com')
+import orjson
+from blake3 import blake3
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Log to the current sys.stdout, so redirection and test capture still see messages."""
+    
+    @property
+    def stream(self) -> Any:
+        return sys.stdout
+    
+    @stream.setter
+    def stream(self, value: Any) -> None:
+        pass
+
+
+def _parse_log_level(value: str) -> Optional[int]:
+    """Convert a FIXTUREGPT_LOG value such as "debug" or "10" to a logging level, or None if invalid."""
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value.upper())
+    return level if isinstance(level, int) else None
+
+
+# Status messages go to stdout by default; FIXTUREGPT_LOG=WARNING silences the routine ones
+logger = logging.getLogger("fixturegpt")
+_log_level = _parse_log_level(os.getenv("FIXTUREGPT_LOG", "INFO"))
+logger.setLevel(logging.INFO if _log_level is None else _log_level)
+_log_handler = _StdoutHandler()
+_log_handler.setFormatter(logging.Formatter("%(message)s"))
+logger.addHandler(_log_handler)
+logger.propagate = False
+if _log_level is None:
+    logger.warning("⚠️  FixtureGPT: Invalid FIXTUREGPT_LOG %r, using INFO", os.getenv("FIXTUREGPT_LOG"))
+
+
+class Mode(str, Enum):
+    """Snapshot modes selected by FIXTUREGPT_MODE."""
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+_MODES = {mode.value: mode for mode in Mode}
+
+# Mode set with set_mode()/use_mode(); falls back to FIXTUREGPT_MODE when unset
+_MODE: "contextvars.ContextVar[Optional[Mode]]" = contextvars.ContextVar("fixturegpt_mode", default=None)
+
+
+@dataclass
+class _RuntimeConfig:
+    """Runtime configuration, read from the environment once per process."""
+    sync_mode: str  # local, cloud, both
+    api_key: Optional[str]
+    api_url: str
+    fixture_format: str  # json, msgpack
+    compression: str  # none, zstd
+    mem_cache_size: int  # fixture files kept in memory
+    durable: bool  # fsync each fixture write outside record_session()
+    dedup: bool  # store identical responses once, in the object store
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable, falling back to the default if it isn't one."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning("⚠️  FixtureGPT: Invalid %s %r, using %d", name, value, default)
+        return default
+
+
+def _config_from_env() -> _RuntimeConfig:
+    """Build the runtime configuration from environment variables."""
+    return _RuntimeConfig(
+        sync_mode=os.getenv('FIXTUREGPT_SYNC_MODE', 'local'),
+        api_key=os.getenv('FIXTUREGPT_API_KEY'),
+        api_url=os.getenv('FIXTUREGPT_API_URL', 'https://app.fixturegpt.com'),
+        fixture_format=os.getenv('FIXTUREGPT_FORMAT', 'json').lower(),
+        compression=os.getenv('FIXTUREGPT_COMPRESSION', 'none').lower(),
+        mem_cache_size=_env_int('FIXTUREGPT_MEM_CACHE', 1024),
+        durable=os.getenv('FIXTUREGPT_DURABLE', '').lower() in ('1', 'true', 'yes'),
+        dedup=os.getenv('FIXTUREGPT_DEDUP', '').lower() in ('1', 'true', 'yes'),
+    )
+
+
+_CFG = _config_from_env()
+# Config pushed with cloud_config(); falls back to _CFG when unset
+_CONFIG: "contextvars.ContextVar[Optional[_RuntimeConfig]]" = contextvars.ContextVar("fixturegpt_config", default=None)
+
+
+def _config() -> _RuntimeConfig:
+    """Return the runtime configuration in effect for the current context."""
+    cfg = _CONFIG.get()
+    return _CFG if cfg is None else cfg
+
+
+# Relative, so it follows the working directory like the original ./fixtures lookup
+_FIXTURES_DIR = Path("./fixtures")
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+_JSON_SCALARS = (str, int, float, bool, type(None))
+_PREFETCH_WORKERS = 8
+_MMAP_MIN_SIZE = 1 << 20  # larger fixtures are decoded from a mapping and not cached
+
+# Raw fixture bytes by path, with the stat signature they were read under, in LRU order
+_FIXTURE_CACHE: "OrderedDict[str, Tuple[Tuple[int, int, int, int], bytes]]" = OrderedDict()
+_FIXTURE_CACHE_LOCK = threading.Lock()
+_MEMO_KEY_LIMIT = 4096  # bytes of serialized inputs worth memoizing
+
+# Results from these packages (and raw bytes) are pickled instead of stored as JSON
+_BINARY_MODULES = ("numpy", "torch")
+_BUFFER_ALIGNMENT = 64
+_FIXTURE_SUFFIXES = (".json", ".msgpack", ".pkl", ".json.zst", ".msgpack.zst")
+# Local log of saved fixtures with each file's size and mtime, so stats doesn't have to open every file
+_INDEX_FILE = ".index.jsonl"
+# Content-addressed responses shared by fixtures when FIXTUREGPT_DEDUP is set
+_OBJECTS_DIR = ".objects"
+_ZSTD_LEVEL = 3
+# zstd compressor/decompressor objects aren't thread-safe, so each thread gets its own
+_zstd_local = threading.local()
+# Fixtures sharing a name are compressed with a dictionary trained on the first few
+_ZSTD_DICT_DIR = ".dicts"
+_ZSTD_DICT_SIZE = 16384
+_ZSTD_DICT_MIN_SAMPLES = 16
+# Keyed by absolute dictionary path, since the fixtures directory follows the working directory
+_zstd_dicts: Dict[str, Any] = {}  # dictionary path -> ZstdCompressionDict, or None if absent
+_zstd_saves: Dict[str, int] = {}  # dictionary path -> compressed saves in this process
+
+# The record_session() writes in this thread or task join; others sync on their own
+_RECORD_SESSION: "contextvars.ContextVar[Optional[_RecordSession]]" = contextvars.ContextVar("fixturegpt_record_session", default=None)
+_fdatasync = getattr(os, 'fdatasync', os.fsync)
+# Errors raised by fixture files that exist but can't be decoded
+_FIXTURE_ERRORS = (ValueError, KeyError, EOFError, ImportError, pickle.UnpicklingError, struct.error)
+
+# Cloud uploads are queued by snapshot() and posted in batches by a worker thread
+_UPLOAD_BATCH_SIZE = 32
+_UPLOAD_LINGER = 0.1  # seconds to wait for a batch to fill
+_UPLOAD_EXIT_TIMEOUT = 15.0
+_UPLOAD_QUEUE_MAX = 1024  # oldest pending uploads are dropped beyond this
+# Pending uploads as ((api_url, api_key), name, JSON body), captured from the caller's config
+_upload_queue: Deque[Tuple[Tuple[str, str], str, bytes]] = deque(maxlen=_UPLOAD_QUEUE_MAX)
+_upload_cond = threading.Condition()
+_upload_worker: Optional[threading.Thread] = None
+_uploads_in_flight = 0
+# API URLs that answered 404 on the batch route; later uploads go straight to single POSTs
+_no_batch_route: Set[str] = set()
+
+# Cloud fixture responses by (api_url, api_key, name, hash), stored encoded so each hit is a fresh copy.
+# The key is included because cloud_config() lets contexts use different accounts.
+_CLOUD_CACHE_MAX = 256
+_cloud_cache: "OrderedDict[Tuple[str, str, str, str], bytes]" = OrderedDict()
+_cloud_cache_lock = threading.Lock()
+
+# HTTP session shared by all cloud calls so connections are reused
+_SESSION: Optional[Any] = None
+_SESSION_LOCK = threading.Lock()
+_HTTP_RETRIES = 3
 
 def _get_fixtures_dir() -> Path:
-    """Get the fixtures directory, creating it if it doesn't exist."""
-    fixtures_dir = Path("./fixtures")
-    fixtures_dir.mkdir(exist_ok=True)
-    return fixtures_dir
+    """Get the fixtures directory, which is created on the first write."""
+    return _FIXTURES_DIR
 
 
-def _hash_inputs(args: Tuple, kwargs: Dict[str, Any]) -> str:
-    """Create a SHA256 hash of the function inputs for deduplication."""
-    # Convert args and kwargs to a stable string representation
-    input_data = {
+@contextlib.contextmanager
+def _open_for_write(path: Path, exclusive: bool = False) -> Iterator[BinaryIO]:
+    """
+    Write a fixture file atomically, creating the fixtures directory if needed.
+    
+    Data goes to a temporary file that replaces the target only once fully
+    written, so concurrent readers and crashes never leave a torn fixture.
+    
+    Args:
+        path: File to write
+        exclusive: Raise FileExistsError instead of replacing an existing file
+    """
+    tmp = path.parent / f".{path.name}.{os.urandom(4).hex()}.tmp"
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    try:
+        fd = os.open(tmp, flags, 0o666)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(tmp, flags, 0o666)
+    
+    # Inside a record_session() the sync is deferred to the end of the session
+    durable = _config().durable and _RECORD_SESSION.get() is None
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            if durable:
+                f.flush()
+                _fdatasync(f.fileno())
+        if exclusive:
+            # link() publishes the complete file but, unlike replace(), fails if the target exists
+            try:
+                os.link(tmp, path)
+            finally:
+                os.unlink(tmp)
+        else:
+            os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    if durable:
+        _fsync_dir(path.parent)
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Stringify unknown objects for orjson, except tuple subclasses, which stdlib json writes as lists."""
+    if isinstance(obj, tuple):
+        raise TypeError(f"{type(obj).__name__} is left to stdlib json")
+    return str(obj)
+
+
+def _has_nonfinite(obj: Any) -> bool:
+    """Check for NaN or infinite floats, which orjson would write as null."""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_nonfinite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_nonfinite(value) for value in obj)
+    return False
+
+
+def _dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """Serialize an object to JSON bytes, falling back to stdlib json where orjson would lose data."""
+    option = _ORJSON_OPTIONS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    
+    try:
+        data = orjson.dumps(obj, default=_orjson_default, option=option)
+        # Only walk the object when a null could stand for NaN or Infinity
+        if b"null" not in data or not _has_nonfinite(obj):
+            return data
+    except TypeError:
+        # e.g. integers wider than 64 bits, mixed-type dict keys or namedtuples
+        pass
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys, default=str).encode()
+
+
+def _loads(data: Union[bytes, memoryview]) -> Any:
+    """Deserialize JSON bytes."""
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # NaN and Infinity, as written by the stdlib fallback in _dumps()
+        return json.loads(bytes(data))
+
+
+def _input_data(args: Tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Collect the function inputs into a single hashable structure."""
+    # No need to sort kwargs here: both serializers are called with key sorting,
+    # which applies to nested dicts too
+    return {
         "args": args,
         "kwargs": kwargs
     }
-    
-    # Sort kwargs for consistent hashing
-    if kwargs:
-        input_data["kwargs"] = dict(sorted(kwargs.items()))
-    
-    input_str = json.dumps(input_data, sort_keys=True, default=str)
-    return hashlib.sha256(input_str.encode()).hexdigest()[:16]  # Use first 16 chars
+
+
+def _serialize_inputs(args: Tuple, kwargs: Dict[str, Any]) -> bytes:
+    """Build the stable byte representation of the function inputs."""
+    return _dumps(_input_data(args, kwargs), sort_keys=True)
+
+
+def _digest(input_key: bytes) -> str:
+    """Hash serialized inputs into a 16 hex char fixture key."""
+    return blake3(input_key).hexdigest(length=8)
+
+
+@functools.lru_cache(maxsize=1024)
+def _hash_cached(input_key: bytes) -> str:
+    """Hash serialized inputs, memoized for inputs that repeat within a process."""
+    return _digest(input_key)
+
+
+_EMPTY_INPUTS_HASH = _digest(_serialize_inputs((), {}))
+
+
+def _hash_key(input_key: bytes) -> str:
+    """Hash serialized inputs, memoizing only small inputs."""
+    if len(input_key) > _MEMO_KEY_LIMIT:
+        # Large inputs would pin multi-KB keys in the cache; hash them directly
+        return _digest(input_key)
+    return _hash_cached(input_key)
+
+
+def _hash_inputs(args: Tuple, kwargs: Dict[str, Any]) -> str:
+    """Create a BLAKE3 hash of the function inputs for deduplication."""
+    if not args and not kwargs:
+        return _EMPTY_INPUTS_HASH
+    return _hash_key(_serialize_inputs(args, kwargs))
+
+
+def _fixture_stem(name: str, input_key: bytes) -> str:
+    """Derive the fixture filename stem for serialized inputs."""
+    return f"{name}-{_hash_key(input_key)}"
+
+
+def _legacy_hash_inputs(args: Tuple, kwargs: Dict[str, Any]) -> str:
+    """SHA256 hash used to name fixtures recorded by fixturegpt <= 0.1.1."""
+    input_str = json.dumps(_input_data(args, kwargs), sort_keys=True, default=str)
+    return hashlib.sha256(input_str.encode()).hexdigest()[:16]
 
 
 def _is_json_serializable(obj: Any) -> bool:
     """Check if an object is JSON serializable."""
+    # Scalars always are; containers are cheapest to check by serializing with orjson
+    if isinstance(obj, _JSON_SCALARS):
+        return True
     try:
-        json.dumps(obj, default=str)
+        _dumps(obj)
         return True
     except (TypeError, ValueError):
         return False
 
 
-def _sync_to_cloud(name: str, args: Tuple, kwargs: Dict[str, Any], response: Any, estimated_cost: float = 0.002) -> bool:
-    """Sync fixture to cloud dashboard."""
-    if not FIXTUREGPT_API_KEY:
+def _sync_to_cloud(name: str, args: Tuple, kwargs: Dict[str, Any], input_key: bytes, response: Any, estimated_cost: float = 0.002) -> bool:
+    """Queue a fixture for upload to the cloud dashboard."""
+    cfg = _config()
+    if not cfg.api_key:
         return False
     
-    try:
-        import requests
+    payload = {
+        'name': name,
+        'hash': _hash_key(input_key),
+        'args': list(args) if args else [],
+        'kwargs': kwargs or {},
+        'response': response,
+        'estimated_cost': estimated_cost
+    }
+    # Encode now: the caller may mutate the result before the worker gets to it
+    data = _dumps(payload)
+    
+    global _upload_worker
+    with _upload_cond:
+        if len(_upload_queue) == _UPLOAD_QUEUE_MAX:
+            # Don't block snapshot() on a slow or unreachable dashboard
+            logger.warning("⚠️  FixtureGPT: Upload queue full, dropping fixture '%s'", _upload_queue[0][1])
+        _upload_queue.append(((cfg.api_url, cfg.api_key), name, data))
+        if _upload_worker is None:
+            _upload_worker = threading.Thread(target=_run_upload_worker, name="fixturegpt-upload", daemon=True)
+            _upload_worker.start()
+        _upload_cond.notify_all()
+    return True
+
+
+def _run_upload_worker() -> None:
+    """Drain the upload queue in batches for the lifetime of the process."""
+    global _uploads_in_flight
+    while True:
+        with _upload_cond:
+            _upload_cond.wait_for(lambda: bool(_upload_queue))
+            # Linger briefly so back-to-back snapshot() calls share one request
+            _upload_cond.wait_for(lambda: len(_upload_queue) >= _UPLOAD_BATCH_SIZE, timeout=_UPLOAD_LINGER)
+            # A batch goes to a single dashboard, so it stops at the first upload for another
+            target = _upload_queue[0][0]
+            batch = []
+            while _upload_queue and _upload_queue[0][0] == target and len(batch) < _UPLOAD_BATCH_SIZE:
+                batch.append(_upload_queue.popleft()[1:])
+            _uploads_in_flight += len(batch)
         
-        payload = {
-            'name': name,
-            'args': list(args) if args else [],
-            'kwargs': kwargs or {},
-            'response': response,
-            'estimated_cost': estimated_cost
-        }
+        try:
+            _post_fixtures(batch, *target)
+        finally:
+            with _upload_cond:
+                _uploads_in_flight -= len(batch)
+                _upload_cond.notify_all()
+
+
+def _get_session() -> Any:
+    """Return the shared requests.Session, creating it on first use."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            
+            session = requests.Session()
+            # Retry connection failures and gateway errors; POSTs are only retried
+            # when the request never reached the server, so uploads aren't duplicated
+            retry = Retry(total=_HTTP_RETRIES, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['Content-Type'] = 'application/json'
+            _SESSION = session
+        return _SESSION
+
+
+def _auth_headers(api_key: str) -> Dict[str, str]:
+    """Build per-request auth headers, since the session is shared across API keys."""
+    return {'Authorization': f'Bearer {api_key}'}
+
+
+def _post_fixtures(batch: List[Tuple[str, bytes]], api_url: str, api_key: str) -> bool:
+    """Upload a batch of (name, encoded fixture) pairs, falling back to one request per fixture."""
+    try:
+        session = _get_session()
+        headers = _auth_headers(api_key)
         
-        headers = {
-            'Authorization': f'Bearer {FIXTUREGPT_API_KEY}',
-            'Content-Type': 'application/json'
-        }
+        response = None
+        if api_url not in _no_batch_route:
+            response = session.post(
+                f'{api_url}/api/fixtures/batch',
+                data=b'{"fixtures":[' + b','.join(data for _, data in batch) + b']}',
+                headers=headers,
+                timeout=10
+            )
+            if response.status_code == 404:
+                _no_batch_route.add(api_url)
+                response = None
         
-        response = requests.post(
-            f'{FIXTUREGPT_API_URL}/api/fixtures',
-            json=payload,
-            headers=headers,
-            timeout=10
-        )
+        if response is None:
+            # Servers without the batch endpoint only accept single fixtures
+            responses = [
+                session.post(f'{api_url}/api/fixtures', data=data, headers=headers, timeout=10)
+                for _, data in batch
+            ]
+            failed = [r for r in responses if r.status_code not in [200, 201]]
+            response = failed[0] if failed else responses[-1]
         
+        synced = f"'{batch[0][0]}'" if len(batch) == 1 else f"{len(batch)} fixtures"
         if response.status_code in [200, 201]:
-            print(f"☁️  FixtureGPT: Synced '{name}' to cloud dashboard")
+            logger.info("☁️  FixtureGPT: Synced %s to cloud dashboard", synced)
             return True
         else:
-            print(f"⚠️  FixtureGPT: Cloud sync failed ({response.status_code}): {response.text}")
+            logger.warning("⚠️  FixtureGPT: Cloud sync failed (%s): %s", response.status_code, response.text)
             return False
             
     except ImportError:
-        print("⚠️  FixtureGPT: 'requests' library required for cloud sync. Install with: pip install requests")
+        logger.warning("⚠️  FixtureGPT: 'requests' library required for cloud sync. Install with: pip install requests")
         return False
     except Exception as e:
-        print(f"⚠️  FixtureGPT: Cloud sync error: {e}")
+        logger.warning("⚠️  FixtureGPT: Cloud sync error: %s", e)
         return False
 
 
-def _load_from_cloud(name: str, args: Tuple, kwargs: Dict[str, Any]) -> Optional[Any]:
+def flush_cloud_sync(timeout: Optional[float] = None) -> bool:
+    """
+    Wait for queued cloud uploads to finish.
+    
+    Args:
+        timeout: Maximum number of seconds to wait (default: no limit)
+    
+    Returns:
+        True if the queue was drained, False if the timeout expired first
+    """
+    with _upload_cond:
+        return _upload_cond.wait_for(lambda: not _upload_queue and not _uploads_in_flight, timeout=timeout)
+
+
+atexit.register(flush_cloud_sync, _UPLOAD_EXIT_TIMEOUT)
+
+
+def _load_from_cloud(name: str, args: Tuple, kwargs: Dict[str, Any], input_key: bytes) -> Optional[Any]:
     """Try to load fixture from cloud dashboard."""
-    if not FIXTUREGPT_API_KEY:
+    cfg = _config()
+    if not cfg.api_key:
         return None
     
+    # Generate hash for lookup
+    hash_value = _hash_key(input_key)
+    cache_key = (cfg.api_url, cfg.api_key, name, hash_value)
+    with _cloud_cache_lock:
+        cached = _cloud_cache.get(cache_key)
+        if cached is not None:
+            _cloud_cache.move_to_end(cache_key)
+    if cached is not None:
+        logger.info("☁️  FixtureGPT: Loaded '%s' from cloud dashboard (cached)", name)
+        return _loads(cached)
+    
     try:
-        import requests
-        
-        # Generate hash for lookup
-        hash_value = _hash_inputs(args, kwargs)
-        
-        headers = {
-            'Authorization': f'Bearer {FIXTUREGPT_API_KEY}',
-            'Content-Type': 'application/json'
-        }
+        session = _get_session()
         
-        # Search for fixture by name and hash
+        # Search for fixture by name and hash; servers that can't filter by
+        # hash return the name matches, which are checked below
         params = {
             'search': name,
+            'hash': hash_value,
             'limit': 50
         }
         
-        response = requests.get(
-            f'{FIXTUREGPT_API_URL}/api/fixtures',
+        response = session.get(
+            f'{cfg.api_url}/api/fixtures',
             params=params,
-            headers=headers,
+            headers=_auth_headers(cfg.api_key),
             timeout=10
         )
         
@@ -124,24 +528,321 @@ def _load_from_cloud(name: str, args: Tuple, kwargs: Dict[str, Any]) -> Optional
             for fixture in fixtures:
                 if (fixture.get('name') == name and 
                     _hash_inputs(tuple(fixture.get('args', [])), fixture.get('kwargs', {})) == hash_value):
-                    print(f"☁️  FixtureGPT: Loaded '{name}' from cloud dashboard")
-                    return fixture.get('response')
+                    logger.info("☁️  FixtureGPT: Loaded '%s' from cloud dashboard", name)
+                    result = fixture.get('response')
+                    if result is not None:
+                        with _cloud_cache_lock:
+                            _cloud_cache[cache_key] = _dumps(result)
+                            while len(_cloud_cache) > _CLOUD_CACHE_MAX:
+                                _cloud_cache.popitem(last=False)
+                    return result
         
         return None
         
     except ImportError:
         return None
     except Exception as e:
-        print(f"⚠️  FixtureGPT: Cloud load error: {e}")
+        logger.warning("⚠️  FixtureGPT: Cloud load error: %s", e)
         return None
 
 
-def _save_fixture(name: str, args: Tuple, kwargs: Dict[str, Any], response: Any) -> str:
+class _RecordSession:
+    """Files written inside a record_session(), synced together when it ends."""
+    
+    def __init__(self) -> None:
+        self.paths: List[Path] = []
+        self.closed = False
+        self.lock = threading.Lock()
+
+
+def _track_write(path: Path) -> None:
+    """Remember a written fixture file so the active record session can sync it."""
+    session = _RECORD_SESSION.get()
+    if session is None:
+        return
+    with session.lock:
+        if not session.closed:
+            session.paths.append(path)
+            return
+    # The session ended while the file was being written, e.g. by a task that outlived it
+    _sync_paths([path])
+
+
+def _sync_paths(paths: List[Path]) -> None:
+    """Flush written files to stable storage, then their directories once each."""
+    for path in dict.fromkeys(paths):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                _fdatasync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
+            continue  # e.g. removed by a later write in the same session
+    
+    for directory in dict.fromkeys(path.parent for path in paths):
+        _fsync_dir(directory)
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Persist a directory's entries, e.g. after renaming a file into it."""
+    if os.name == 'nt':
+        return  # directories can't be opened for fsync on Windows
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def record_session() -> Iterator[None]:
+    """
+    Group fixture writes and make them durable together on exit.
+    
+    Fixtures are written as usual inside the block, so they can be replayed
+    right away. On exit every file written in the session is flushed to disk
+    and the fixtures directory is synced once, instead of paying for that
+    per fixture. Nested sessions join the outermost one.
+    
+    The session covers writes made in the current thread or asyncio task,
+    including snapshot_async() calls awaited from it. Other threads write
+    as if there were no session.
+    """
+    active = _RECORD_SESSION.get()
+    if active is not None and not active.closed:
+        yield
+        return
+    
+    session = _RecordSession()
+    token = _RECORD_SESSION.set(session)
+    try:
+        yield
+    finally:
+        _RECORD_SESSION.reset(token)
+        with session.lock:
+            session.closed = True
+        _sync_paths(session.paths)
+
+
+def _append_index(filepath: Path, name: str, timestamp: str) -> None:
+    """Record a saved fixture in the directory index."""
+    try:
+        st = os.stat(filepath)
+        entry = {"filename": filepath.name, "name": name, "timestamp": timestamp,
+                 "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        with open(filepath.parent / _INDEX_FILE, 'ab') as f:
+            f.write(_dumps(entry) + b"\n")
+    except OSError:
+        pass  # Entries that are missing or don't match the file are re-read by get_fixture_stats()
+
+
+def _read_index(fixtures_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Return the indexed fixtures by filename; entries may be stale."""
+    try:
+        with open(fixtures_dir / _INDEX_FILE, 'rb') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return {}
+    
+    # Re-recorded fixtures appear more than once; the last entry wins
+    entries: Dict[str, Dict[str, Any]] = {}
+    for line in lines:
+        try:
+            entry = _loads(line)
+        except ValueError:
+            continue  # Torn append from an interrupted write
+        if not isinstance(entry, dict) or not isinstance(entry.get("filename"), str) or not {"name", "timestamp"} <= entry.keys():
+            continue  # Not written by _append_index(), e.g. edited by hand
+        entries[entry["filename"]] = entry
+    return entries
+
+
+def _write_index(fixtures_dir: Path, entries: List[Dict[str, Any]]) -> None:
+    """Replace the directory index with the given entries."""
+    try:
+        # Replaced atomically, so a concurrent _append_index() can't interleave with the rewrite
+        with _open_for_write(fixtures_dir / _INDEX_FILE) as f:
+            f.write(b"".join(_dumps(entry) + b"\n" for entry in entries))
+    except OSError:
+        pass
+
+
+def _encode_fixture(stem: str, fixture_data: Dict[str, Any]) -> Tuple[str, bytes]:
+    """Encode a fixture in the configured FIXTUREGPT_FORMAT, returning its filename and bytes."""
+    if _config().fixture_format == "msgpack":
+        try:
+            import msgpack
+        except ImportError:
+            logger.warning("⚠️  FixtureGPT: 'msgpack' library required for FIXTUREGPT_FORMAT=msgpack, saving as JSON. Install with: pip install msgpack")
+        else:
+            return f"{stem}.msgpack", msgpack.packb(fixture_data, use_bin_type=True, default=str)
+    return f"{stem}.json", _dumps(fixture_data, indent=True)
+
+
+def _zstd_dict_path(name: str) -> str:
+    """Absolute path of the zstd dictionary for a fixture name in the current fixtures directory."""
+    return os.path.abspath(_get_fixtures_dir() / _ZSTD_DICT_DIR / f"{name}.zdict")
+
+
+def _zstd_dict(name: str, reload: bool = False) -> Optional[Any]:
+    """Load the trained zstd dictionary for a fixture name, if there is one."""
+    path = _zstd_dict_path(name)
+    if not reload and path in _zstd_dicts:
+        return _zstd_dicts[path]
+    
+    import zstandard
+    try:
+        with open(path, 'rb') as f:
+            zdict = zstandard.ZstdCompressionDict(f.read())
+    except FileNotFoundError:
+        zdict = None
+    _zstd_dicts[path] = zdict
+    return zdict
+
+
+def _zstd_compress(data: bytes, zdict: Optional[Any] = None) -> bytes:
+    """Compress fixture bytes with this thread's zstd compressor for the dictionary."""
+    compressors = _zstd_local.__dict__.setdefault("compressors", {})
+    dict_id = zdict.dict_id() if zdict is not None else 0
+    compressor = compressors.get(dict_id)
+    if compressor is None:
+        import zstandard
+        compressor = compressors[dict_id] = zstandard.ZstdCompressor(level=_ZSTD_LEVEL, dict_data=zdict)
+    return compressor.compress(data)
+
+
+def _zstd_decompress(data: Union[bytes, memoryview], name: str) -> bytes:
+    """Decompress fixture bytes, using the name's dictionary if the frame needs one."""
+    import zstandard
+    try:
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        zdict = None
+        if dict_id:
+            zdict = _zstd_dict(name)
+            if zdict is None or zdict.dict_id() != dict_id:
+                # Another process may have trained it since we looked
+                zdict = _zstd_dict(name, reload=True)
+            if zdict is None or zdict.dict_id() != dict_id:
+                raise ValueError(f"Missing zstd dictionary for '{name}' fixtures")
+        
+        decompressors = _zstd_local.__dict__.setdefault("decompressors", {})
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            decompressor = decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=zdict)
+        return decompressor.decompress(data)
+    except zstandard.ZstdError as e:
+        raise ValueError(f"Corrupt zstd fixture: {e}") from e
+
+
+def _fixture_name(filename: str) -> str:
+    """Recover the fixture name from a "{name}-{hash}" filename."""
+    return filename.rsplit("-", 1)[0]
+
+
+def _scan_fixtures(fixtures_dir: Path, names: Optional[Set[str]] = None) -> List[os.DirEntry]:
+    """List fixture files in one directory pass, optionally only those with the given names."""
+    with os.scandir(fixtures_dir) as it:
+        return [
+            entry for entry in it
+            if entry.name.endswith(_FIXTURE_SUFFIXES)
+            and (names is None or _fixture_name(entry.name) in names)
+            and entry.is_file()
+        ]
+
+
+def _maybe_train_zstd_dict(name: str) -> None:
+    """Train a shared zstd dictionary once enough compressed fixtures exist for a name."""
+    path = _zstd_dict_path(name)
+    saves = _zstd_saves[path] = _zstd_saves.get(path, 0) + 1
+    # Attempt once per process, when the threshold is first reached. Another
+    # process may have trained one since this process last looked.
+    if saves != _ZSTD_DICT_MIN_SAMPLES or _zstd_dict(name, reload=True) is not None:
+        return
+    
+    import zstandard
+    samples = []
+    for entry in _scan_fixtures(_get_fixtures_dir(), {name}):
+        if not entry.name.endswith(".zst"):
+            continue
+        try:
+            samples.append(_zstd_decompress(_read_fixture_bytes(Path(entry.path)), name))
+        except (OSError, ValueError):
+            continue
+    if len(samples) < _ZSTD_DICT_MIN_SAMPLES:
+        return
+    
+    try:
+        zdict = zstandard.train_dictionary(_ZSTD_DICT_SIZE, samples)
+    except zstandard.ZstdError:
+        return  # Too little sample data; keep compressing without a dictionary
+    
+    # Fixtures may already be compressed with an existing dictionary, so it is never replaced
+    try:
+        with _open_for_write(Path(path), exclusive=True) as f:
+            f.write(zdict.as_bytes())
+    except FileExistsError:
+        _zstd_dict(name, reload=True)  # Another process won the race; use its dictionary
+        return
+    except OSError as e:
+        # e.g. filesystems without hard links, such as FAT or some SMB mounts
+        logger.warning("⚠️  FixtureGPT: Could not save zstd dictionary for '%s', compressing without one: %s", name, e)
+        return
+    _track_write(Path(path))
+    _zstd_dicts[path] = zdict
+
+
+def _object_path(ref: str, suffix: str) -> Path:
+    """Path of a content-addressed response in the object store."""
+    return _get_fixtures_dir() / _OBJECTS_DIR / ref[:2] / f"{ref}{suffix}"
+
+
+def _store_response(response: Any) -> str:
+    """Write a response to the object store unless it is already there, and return its ref."""
+    data = _dumps(response)
+    ref = blake3(data).hexdigest(length=16)
+    
+    suffix = ".json"
+    if _config().compression == "zstd":
+        try:
+            data = _zstd_compress(data)
+            suffix = ".json.zst"
+        except ImportError:
+            pass  # _save_fixture() warns about the missing package
+    
+    path = _object_path(ref, suffix)
+    if not path.exists():
+        with _open_for_write(path) as f:
+            f.write(data)
+        _track_write(path)
+    return ref
+
+
+def _read_response_object(ref: str) -> Any:
+    """Read a response from the object store."""
+    for suffix in (".json", ".json.zst"):
+        try:
+            return _read_fixture_file(_object_path(ref, suffix))
+        except FileNotFoundError:
+            continue
+    raise KeyError(f"Missing response object {ref}")
+
+
+def _fixture_response(fixture_data: Dict[str, Any]) -> Any:
+    """Return a fixture's response, resolving it from the object store if deduplicated."""
+    ref = fixture_data.get("response_ref")
+    if ref is None:
+        return fixture_data["response"]
+    return _read_response_object(ref)
+
+
+def _save_fixture(name: str, args: Tuple, kwargs: Dict[str, Any], input_key: bytes, response: Any) -> str:
     """Save a fixture to disk and return the filename."""
     fixtures_dir = _get_fixtures_dir()
-    hash_value = _hash_inputs(args, kwargs)
-    filename = f"{name}-{hash_value}.json"
-    filepath = fixtures_dir / filename
+    stem = _fixture_stem(name, input_key)
     
     fixture_data = {
         "name": name,
@@ -152,30 +853,342 @@ def _save_fixture(name: str, args: Tuple, kwargs: Dict[str, Any], response: Any)
     }
     
     try:
-        with open(filepath, 'w') as f:
-            json.dump(fixture_data, f, indent=2, default=str)
-        return filename
-    except (TypeError, ValueError) as e:
-        print(f"Warning: Could not serialize fixture {filename}: {e}")
+        if _config().dedup:
+            # Identical responses across inputs are stored once and referenced
+            fixture_data["response_ref"] = _store_response(fixture_data.pop("response"))
+        filename, payload = _encode_fixture(stem, fixture_data)
+    except (TypeError, ValueError, OverflowError) as e:
+        logger.warning("Warning: Could not serialize fixture %s: %s", stem, e)
         return ""
+    
+    if _config().compression == "zstd":
+        try:
+            zdict = _zstd_dict(name)
+            if zdict is not None and not os.path.exists(_zstd_dict_path(name)):
+                # Removed since it was loaded; a fixture compressed with it couldn't be replayed
+                zdict = _zstd_dict(name, reload=True)
+            payload = _zstd_compress(payload, zdict)
+            filename += ".zst"
+        except ImportError:
+            logger.warning("⚠️  FixtureGPT: 'zstandard' library required for FIXTUREGPT_COMPRESSION=zstd, saving uncompressed. Install with: pip install zstandard")
+    
+    filepath = fixtures_dir / filename
+    with _open_for_write(filepath) as f:
+        f.write(payload)
+    _track_write(filepath)
+    _append_index(filepath, name, fixture_data["timestamp"])
+    if filename.endswith(".zst"):
+        _maybe_train_zstd_dict(name)
+    return filename
+
+
+def _is_binary_payload(obj: Any) -> bool:
+    """Check if a result should be pickled rather than stored as JSON."""
+    if isinstance(obj, (bytes, bytearray)):
+        return True
+    # Match on the defining module so numpy/torch are never imported here
+    return type(obj).__module__.partition(".")[0] in _BINARY_MODULES
+
 
+def _write_buffers(path: Path, buffers: List[pickle.PickleBuffer]) -> None:
+    """Write out-of-band pickle buffers to a sidecar file: count, sizes, aligned data."""
+    views = [buffer.raw() for buffer in buffers]
+    with _open_for_write(path) as f:
+        f.write(struct.pack(f"<Q{len(views)}Q", len(views), *(view.nbytes for view in views)))
+        for view in views:
+            f.write(b"\0" * (-f.tell() % _BUFFER_ALIGNMENT))
+            f.write(view)
+    _track_write(path)
 
-def _load_fixture(name: str, args: Tuple, kwargs: Dict[str, Any]) -> Optional[Any]:
+
+def _read_buffers(path: Path) -> List[memoryview]:
+    """Map a sidecar file and return zero-copy views of its buffers."""
+    with open(path, 'rb') as f:
+        # Copy-on-write mapping: arrays built on it stay writable without touching the file
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    
+    (count,) = struct.unpack_from("<Q", mapped, 0)
+    sizes = struct.unpack_from(f"<{count}Q", mapped, 8)
+    view = memoryview(mapped)
+    offset = 8 * (count + 1)
+    buffers = []
+    for size in sizes:
+        offset += -offset % _BUFFER_ALIGNMENT
+        buffers.append(view[offset:offset + size])
+        offset += size
+    return buffers
+
+
+def _save_binary_fixture(name: str, args: Tuple, kwargs: Dict[str, Any], input_key: bytes, response: Any) -> str:
+    """Save a binary fixture as a pickle, with large buffers in a .bin sidecar."""
+    fixtures_dir = _get_fixtures_dir()
+    stem = _fixture_stem(name, input_key)
+    filename = f"{stem}.pkl"
+    
+    fixture_data = {
+        "name": name,
+        # Keep inputs in their JSON form, as in .json fixtures
+        "args": _loads(_dumps(args)),
+        "kwargs": _loads(_dumps(kwargs)),
+        "response": response,
+        "timestamp": datetime.now().isoformat()
+    }
+    
+    buffers: List[pickle.PickleBuffer] = []
+    try:
+        payload = pickle.dumps(fixture_data, protocol=5, buffer_callback=buffers.append)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        logger.warning("Warning: Could not pickle fixture %s: %s", filename, e)
+        return ""
+    
+    sidecar = fixtures_dir / f"{stem}.bin"
+    if buffers:
+        _write_buffers(sidecar, buffers)
+    elif sidecar.exists():
+        sidecar.unlink()
+    with _open_for_write(fixtures_dir / filename) as f:
+        f.write(payload)
+    _track_write(fixtures_dir / filename)
+    _append_index(fixtures_dir / filename, name, fixture_data["timestamp"])
+    return filename
+
+
+def _read_cached(path: str, signature: Tuple[int, int, int, int]) -> bytes:
+    """Read a fixture file through the FIXTUREGPT_MEM_CACHE-sized LRU cache."""
+    with _FIXTURE_CACHE_LOCK:
+        entry = _FIXTURE_CACHE.get(path)
+        if entry is not None and entry[0] == signature:
+            _FIXTURE_CACHE.move_to_end(path)
+            return entry[1]
+    
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    cache_size = _config().mem_cache_size
+    if cache_size > 0:
+        with _FIXTURE_CACHE_LOCK:
+            # One entry per path, so a rewritten file replaces its stale contents
+            _FIXTURE_CACHE[path] = (signature, data)
+            _FIXTURE_CACHE.move_to_end(path)
+            while len(_FIXTURE_CACHE) > cache_size:
+                _FIXTURE_CACHE.popitem(last=False)
+    return data
+
+
+def _stat_signature(st: os.stat_result) -> Tuple[int, int, int, int]:
+    """Identify a file's current contents; changes whenever the file is rewritten."""
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _read_fixture_bytes(filepath: Path) -> bytes:
+    """Read a fixture file through the in-process cache."""
+    # Cache raw bytes, not decoded objects, so each replay returns a fresh copy.
+    # Keying on the stat signature makes rewritten files miss the cache.
+    return _read_cached(str(filepath), _stat_signature(os.stat(filepath)))
+
+
+def clear_fixture_cache() -> None:
+    """Drop all fixture contents cached in this process."""
+    with _FIXTURE_CACHE_LOCK:
+        _FIXTURE_CACHE.clear()
+    with _cloud_cache_lock:
+        _cloud_cache.clear()
+    _zstd_dicts.clear()
+
+
+def _decode_fixture(filepath: Path, data: Union[bytes, memoryview]) -> Dict[str, Any]:
+    """Decode the contents of a .json, .msgpack or .pkl fixture file, optionally .zst compressed."""
+    # Path.suffix re-parses the name on every access, and this runs on each replay
+    suffix = filepath.suffix
+    if suffix == ".zst":
+        return _decode_fixture(filepath.with_suffix(""), _zstd_decompress(data, _fixture_name(filepath.name)))
+    if suffix == ".pkl":
+        # Only reached on replay; stats and diff never unpickle
+        sidecar = filepath.with_suffix(".bin")
+        buffers = _read_buffers(sidecar) if sidecar.exists() else None
+        return pickle.loads(data, buffers=buffers)
+    if suffix == ".msgpack":
+        import msgpack
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    return _loads(data)
+
+
+def _read_fixture_file(filepath: Path) -> Dict[str, Any]:
+    """Read and decode a fixture file of any supported format."""
+    st = os.stat(filepath)
+    if st.st_size < _MMAP_MIN_SIZE:
+        return _decode_fixture(filepath, _read_cached(str(filepath), _stat_signature(st)))
+    
+    # Decode large fixtures in place rather than copying them into the heap and cache
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as view:
+            return _decode_fixture(filepath, view)
+
+
+def _fixture_candidates(name: str, args: Tuple, kwargs: Dict[str, Any], input_key: bytes) -> Iterator[Path]:
+    """Yield the paths a fixture for these inputs may be stored under, in lookup order."""
+    fixtures_dir = _get_fixtures_dir()
+    stem = _fixture_stem(name, input_key)
+    # Try the configured format first; fixtures recorded in the others stay readable
+    cfg = _config()
+    formats = (".msgpack", ".json") if cfg.fixture_format == "msgpack" else (".json", ".msgpack")
+    compressions = (".zst", "") if cfg.compression == "zstd" else ("", ".zst")
+    for suffix in formats:
+        for compression in compressions:
+            yield fixtures_dir / f"{stem}{suffix}{compression}"
+    yield fixtures_dir / f"{stem}.pkl"
+    # Fall back to the SHA256-keyed name used by older releases
+    yield fixtures_dir / f"{name}-{_legacy_hash_inputs(args, kwargs)}.json"
+
+
+def _load_fixture(name: str, args: Tuple, kwargs: Dict[str, Any], input_key: bytes) -> Optional[Any]:
     """Load a fixture from disk if it exists."""
+    for filepath in _fixture_candidates(name, args, kwargs, input_key):
+        try:
+            return _fixture_response(_read_fixture_file(filepath))
+        except FileNotFoundError:
+            continue
+        except _FIXTURE_ERRORS:
+            return None
+    return None
+
+
+def prefetch_fixtures(names: Optional[List[str]] = None) -> int:
+    """
+    Read local fixtures ahead of replay.
+    
+    The files are read concurrently so their I/O latency overlaps, and the
+    contents are kept in the in-process fixture cache for snapshot() replays.
+    
+    Args:
+        names: Fixture names to prefetch (e.g., ["rag_search", "rag_generate"]).
+            If omitted, every fixture in the directory is prefetched.
+    
+    Returns:
+        The number of fixture files cached
+    """
     fixtures_dir = _get_fixtures_dir()
-    hash_value = _hash_inputs(args, kwargs)
-    filename = f"{name}-{hash_value}.json"
-    filepath = fixtures_dir / filename
+    if not fixtures_dir.exists():
+        return 0
+    # One directory listing for all names instead of a glob per name
+    entries = _scan_fixtures(fixtures_dir, None if names is None else set(names))
+    if not entries:
+        return 0
     
-    if not filepath.exists():
-        return None
+    def read(entry: os.DirEntry) -> bool:
+        try:
+            if entry.stat().st_size >= _MMAP_MIN_SIZE:
+                return False  # Large fixtures bypass the cache
+            _read_fixture_bytes(Path(entry.path))
+            return True
+        except OSError:
+            return False
+    
+    with ThreadPoolExecutor(max_workers=min(_PREFETCH_WORKERS, len(entries))) as executor:
+        return sum(executor.map(read, entries))
+
+
+def _parse_mode(value: Union[str, Mode]) -> Mode:
+    """Convert a mode name such as "record" or "REPLAY" to a Mode."""
+    mode = _MODES.get(value)
+    if mode is None:
+        mode = _MODES.get(value.lower())
+        if mode is None:
+            raise ValueError(f"Invalid FIXTUREGPT_MODE: {value}. Use 'record' or 'replay'")
+    return mode
+
+
+def _current_mode() -> Mode:
+    """Resolve the mode set for this context, else FIXTUREGPT_MODE."""
+    mode = _MODE.get()
+    if mode is not None:
+        return mode
+    # The environment may be changed between snapshot() calls
+    return _parse_mode(os.environ.get("FIXTUREGPT_MODE", "record"))
+
+
+def set_mode(mode: Optional[Union[str, Mode]]) -> None:
+    """
+    Set the snapshot mode for the current context.
+    
+    Unlike FIXTUREGPT_MODE, the mode is local to the current thread or asyncio
+    task, so concurrent tasks can record and replay independently.
     
+    Args:
+        mode: "record" or "replay", or None to fall back to FIXTUREGPT_MODE
+    """
+    _MODE.set(None if mode is None else _parse_mode(mode))
+
+
+@contextlib.contextmanager
+def use_mode(mode: Union[str, Mode]) -> Iterator[None]:
+    """
+    Use a snapshot mode for the duration of a with block.
+    
+    Example:
+        with use_mode("replay"):
+            result = snapshot("llm_call", call_llm, prompt)
+    
+    Args:
+        mode: "record" or "replay"
+    """
+    token = _MODE.set(_parse_mode(mode))
     try:
-        with open(filepath, 'r') as f:
-            fixture_data = json.load(f)
-        return fixture_data["response"]
-    except (json.JSONDecodeError, KeyError, FileNotFoundError):
-        return None
+        yield
+    finally:
+        _MODE.reset(token)
+
+
+def _replay(name: str, args: Tuple, kwargs: Dict[str, Any], input_key: bytes, sync_mode: str) -> Optional[Any]:
+    """Look up a recorded result locally and/or in the cloud."""
+    cached_result = None
+    
+    # Try local first (faster)
+    if sync_mode in ['local', 'both']:
+        cached_result = _load_fixture(name, args, kwargs, input_key)
+        if cached_result is not None:
+            logger.info("📼 FixtureGPT: Replaying local fixture '%s'", name)
+            return cached_result
+    
+    # Try cloud if local not found and cloud is enabled
+    if sync_mode in ['cloud', 'both'] and cached_result is None:
+        cached_result = _load_from_cloud(name, args, kwargs, input_key)
+        if cached_result is not None:
+            # Save to local for faster future access
+            if sync_mode == 'both' and _is_json_serializable(cached_result):
+                _save_fixture(name, args, kwargs, input_key, cached_result)
+            return cached_result
+    
+    logger.warning("⚠️  FixtureGPT: No fixture found for '%s', falling back to live call", name)
+    return None
+
+
+def _record(name: str, args: Tuple, kwargs: Dict[str, Any], input_key: bytes, result: Any, sync_mode: str) -> None:
+    """Persist a freshly computed result locally and/or to the cloud."""
+    if _is_binary_payload(result):
+        # Binary results stay local; the cloud API only accepts JSON
+        if sync_mode in ['local', 'both']:
+            filename = _save_binary_fixture(name, args, kwargs, input_key, result)
+            if filename:
+                logger.info("💾 FixtureGPT: Saved local binary fixture as '%s'", filename)
+        if sync_mode in ['cloud', 'both']:
+            logger.warning("⚠️  FixtureGPT: Binary result for '%s' is not synced to the cloud", name)
+        return
+    
+    # Save locally; serializing the fixture doubles as the serializability check
+    if sync_mode in ['local', 'both']:
+        filename = _save_fixture(name, args, kwargs, input_key, result)
+        if not filename:
+            logger.warning("⚠️  FixtureGPT: Result not JSON serializable, skipping save")
+            return
+        logger.info("💾 FixtureGPT: Saved local fixture as '%s'", filename)
+    elif not _is_json_serializable(result):
+        logger.warning("⚠️  FixtureGPT: Result not JSON serializable, skipping save")
+        return
+    
+    # Sync to cloud
+    if sync_mode in ['cloud', 'both']:
+        _sync_to_cloud(name, args, kwargs, input_key, result)
 
 
 def snapshot(name: str, fn: Callable, *args, **kwargs) -> Any:
@@ -197,59 +1210,70 @@ def snapshot(name: str, fn: Callable, *args, **kwargs) -> Any:
         FIXTUREGPT_SYNC_MODE: "local", "cloud", or "both" (default: "local")
         FIXTUREGPT_API_URL: SaaS dashboard URL (default: "https://app.fixturegpt.com")
     """
-    mode = os.environ.get("FIXTUREGPT_MODE", "record").lower()
+    mode = _current_mode()
+    sync_mode = _config().sync_mode
+    # Serialized once and shared by the fixture lookup, save and cloud sync
+    input_key = _serialize_inputs(args, kwargs)
     
-    if mode == "replay":
-        # Try to load existing fixture
-        cached_result = None
-        
-        # Try local first (faster)
-        if FIXTUREGPT_SYNC_MODE in ['local', 'both']:
-            cached_result = _load_fixture(name, args, kwargs)
-            if cached_result is not None:
-                print(f"📼 FixtureGPT: Replaying local fixture '{name}'")
-                return cached_result
-        
-        # Try cloud if local not found and cloud is enabled
-        if FIXTUREGPT_SYNC_MODE in ['cloud', 'both'] and cached_result is None:
-            cached_result = _load_from_cloud(name, args, kwargs)
-            if cached_result is not None:
-                # Save to local for faster future access
-                if FIXTUREGPT_SYNC_MODE == 'both' and _is_json_serializable(cached_result):
-                    _save_fixture(name, args, kwargs, cached_result)
-                return cached_result
-        
-        if cached_result is None:
-            print(f"⚠️  FixtureGPT: No fixture found for '{name}', falling back to live call")
-            mode = "record"  # Fall back to recording if no fixture exists
+    if mode is Mode.REPLAY:
+        cached_result = _replay(name, args, kwargs, input_key, sync_mode)
+        if cached_result is not None:
+            return cached_result
+        # Fall back to recording if no fixture exists
     
-    if mode == "record":
-        # Call the actual function
-        print(f"🔴 FixtureGPT: Recording fixture '{name}'")
-        try:
-            result = fn(*args, **kwargs)
-            
-            # Save the fixture if serializable
-            if _is_json_serializable(result):
-                # Save locally
-                if FIXTUREGPT_SYNC_MODE in ['local', 'both']:
-                    filename = _save_fixture(name, args, kwargs, result)
-                    if filename:
-                        print(f"💾 FixtureGPT: Saved local fixture as '{filename}'")
-                
-                # Sync to cloud
-                if FIXTUREGPT_SYNC_MODE in ['cloud', 'both']:
-                    _sync_to_cloud(name, args, kwargs, result)
-            else:
-                print(f"⚠️  FixtureGPT: Result not JSON serializable, skipping save")
-            
-            return result
-        except Exception as e:
-            print(f"❌ FixtureGPT: Error calling function: {e}")
-            raise
+    # Call the actual function
+    logger.info("🔴 FixtureGPT: Recording fixture '%s'", name)
+    try:
+        result = fn(*args, **kwargs)
+        _record(name, args, kwargs, input_key, result, sync_mode)
+        return result
+    except Exception as e:
+        logger.error("❌ FixtureGPT: Error calling function: %s", e)
+        raise
+
+
+async def snapshot_async(name: str, fn: Callable, *args, **kwargs) -> Any:
+    """
+    Async variant of snapshot() for coroutine functions.
     
-    else:
-        raise ValueError(f"Invalid FIXTUREGPT_MODE: {mode}. Use 'record' or 'replay'")
+    Fixture disk I/O, and plain functions, run in the default executor so
+    independent snapshots can be awaited concurrently, e.g. with asyncio.gather().
+    
+    Args:
+        name: User-defined label for the fixture (e.g., "user_summary")
+        fn: Coroutine function (or plain function) to call
+        *args: Positional arguments to pass to the function
+        **kwargs: Keyword arguments to pass to the function
+    
+    Returns:
+        The function result (either recorded or replayed)
+    """
+    loop = asyncio.get_running_loop()
+    # run_in_executor doesn't carry context over, which would drop cloud_config() overrides
+    context = contextvars.copy_context()
+    mode = _current_mode()
+    sync_mode = _config().sync_mode
+    input_key = _serialize_inputs(args, kwargs)
+    
+    if mode is Mode.REPLAY:
+        cached_result = await loop.run_in_executor(None, context.run, _replay, name, args, kwargs, input_key, sync_mode)
+        if cached_result is not None:
+            return cached_result
+    
+    logger.info("🔴 FixtureGPT: Recording fixture '%s'", name)
+    try:
+        if inspect.iscoroutinefunction(fn):
+            result = await fn(*args, **kwargs)
+        else:
+            # A blocking call on the loop thread would stall every other task
+            result = await loop.run_in_executor(None, functools.partial(context.run, fn, *args, **kwargs))
+            if inspect.isawaitable(result):
+                result = await result
+        await loop.run_in_executor(None, context.run, _record, name, args, kwargs, input_key, result, sync_mode)
+        return result
+    except Exception as e:
+        logger.error("❌ FixtureGPT: Error calling function: %s", e)
+        raise
 
 
 def configure_cloud_sync(api_key: str, sync_mode: str = 'both', api_url: str = 'https://app.fixturegpt.com') -> None:
@@ -261,17 +1285,46 @@ def configure_cloud_sync(api_key: str, sync_mode: str = 'both', api_url: str = '
         sync_mode: "local", "cloud", or "both" (default: "both")
         api_url: SaaS dashboard URL (default: "https://app.fixturegpt.com")
     """
-    os.environ['FIXTUREGPT_API_KEY'] = api_key
-    os.environ['FIXTUREGPT_SYNC_MODE'] = sync_mode
-    os.environ['FIXTUREGPT_API_URL'] = api_url
+    cfg = _config()
+    if cfg is _CFG:
+        os.environ['FIXTUREGPT_API_KEY'] = api_key
+        os.environ['FIXTUREGPT_SYNC_MODE'] = sync_mode
+        os.environ['FIXTUREGPT_API_URL'] = api_url
+    
+    # Update the cached runtime configuration; inside cloud_config() only that block's copy changes
+    cfg.api_key = api_key
+    cfg.sync_mode = sync_mode
+    cfg.api_url = api_url
+    
+    logger.info("☁️  FixtureGPT: Cloud sync configured (mode: %s)", sync_mode)
+
+
+@contextlib.contextmanager
+def cloud_config(**overrides: Any) -> Iterator[None]:
+    """
+    Override runtime settings for the duration of a with block.
+    
+    The overrides apply to the current thread or asyncio task only and leave
+    the FIXTUREGPT_* environment variables untouched.
     
-    # Update global variables
-    global FIXTUREGPT_API_KEY, FIXTUREGPT_SYNC_MODE, FIXTUREGPT_API_URL
-    FIXTUREGPT_API_KEY = api_key
-    FIXTUREGPT_SYNC_MODE = sync_mode
-    FIXTUREGPT_API_URL = api_url
+    Example:
+        with cloud_config(api_key="test-key", sync_mode="cloud"):
+            result = snapshot("llm_call", call_llm, prompt)
     
-    print(f"☁️  FixtureGPT: Cloud sync configured (mode: {sync_mode})")
+    Args:
+        **overrides: Settings to change, e.g. api_key, sync_mode or api_url
+    """
+    token = _CONFIG.set(replace(_config(), **overrides))
+    try:
+        yield
+    finally:
+        _CONFIG.reset(token)
+
+
+def refresh_config() -> None:
+    """Re-read the FIXTUREGPT_* configuration environment variables."""
+    global _CFG
+    _CFG = _config_from_env()
 
 
 def get_fixture_stats() -> Dict[str, Any]:
@@ -281,25 +1334,49 @@ def get_fixture_stats() -> Dict[str, Any]:
     if not fixtures_dir.exists():
         return {"count": 0, "total_size": 0, "fixtures": []}
     
-    fixtures = list(fixtures_dir.glob("*.json"))
-    total_size = sum(f.stat().st_size for f in fixtures)
-    
+    index = _read_index(fixtures_dir)
     fixture_info = []
-    for fixture_file in fixtures:
-        try:
-            with open(fixture_file, 'r') as f:
-                data = json.load(f)
-            fixture_info.append({
-                "name": data.get("name", "unknown"),
-                "filename": fixture_file.name,
-                "timestamp": data.get("timestamp", "unknown"),
-                "size": fixture_file.stat().st_size
-            })
-        except (json.JSONDecodeError, KeyError):
+    total_size = 0
+    count = 0
+    changed = False
+    for entry in _scan_fixtures(fixtures_dir):
+        st = entry.stat()
+        count += 1
+        total_size += st.st_size
+        is_pickle = entry.name.endswith(".pkl")
+        if is_pickle:
+            with contextlib.suppress(FileNotFoundError):
+                total_size += os.stat(entry.path[:-len(".pkl")] + ".bin").st_size
+        
+        # An index entry is only trusted for the exact file it was written for
+        cached = index.get(entry.name)
+        if cached is not None and cached.get("size") == st.st_size and cached.get("mtime_ns") == st.st_mtime_ns:
+            fixture_info.append(cached)
             continue
+        
+        changed = True
+        if is_pickle:
+            # Unpickling runs code, so it is left to replay; take the name and time from the file
+            name, timestamp = _fixture_name(entry.name), datetime.fromtimestamp(st.st_mtime).isoformat()
+        else:
+            try:
+                data = _read_fixture_file(Path(entry.path))
+            except _FIXTURE_ERRORS:
+                continue
+            name, timestamp = data.get("name", "unknown"), data.get("timestamp", "unknown")
+        fixture_info.append({
+            "filename": entry.name,
+            "name": name,
+            "timestamp": timestamp,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns
+        })
+    
+    if changed or len(index) != len(fixture_info):
+        _write_index(fixtures_dir, fixture_info)
     
     return {
-        "count": len(fixtures),
+        "count": count,
         "total_size": total_size,
         "fixtures": fixture_info
     }
@@ -317,20 +1394,30 @@ def diff_fixture(name: str) -> Dict[str, Any]:
     """
     fixtures_dir = _get_fixtures_dir()
     
-    # Find all fixtures with the given name
-    matching_fixtures = list(fixtures_dir.glob(f"{name}-*.json"))
+    # Filenames start with the fixture name, so no file has to be opened to match it
+    if fixtures_dir.exists():
+        # Match the exact name, not every fixture whose name starts with it
+        matching_fixtures = [Path(entry.path) for entry in _scan_fixtures(fixtures_dir, {name})]
+    else:
+        matching_fixtures = []
     
     if not matching_fixtures:
         return {"error": f"No fixtures found with name '{name}'"}
     
     results = []
     for fixture_file in matching_fixtures:
+        if fixture_file.suffix == ".pkl":
+            # Unpickling runs code, so binary fixtures are only ever loaded on replay
+            results.append({
+                "filename": fixture_file.name,
+                "error": "Binary fixtures are only unpickled on replay"
+            })
+            continue
         try:
-            with open(fixture_file, 'r') as f:
-                fixture_data = json.load(f)
+            fixture_data = _read_fixture_file(fixture_file)
             
             # Extract the original function call info
-            original_response = fixture_data["response"]
+            original_response = _fixture_response(fixture_data)
             args = tuple(fixture_data.get("args", []))
             kwargs = fixture_data.get("kwargs", {})
             
@@ -347,7 +1434,7 @@ def diff_fixture(name: str) -> Dict[str, Any]:
                 "note": "Re-execution requires the original function reference"
             })
             
-        except (json.JSONDecodeError, KeyError) as e:
+        except _FIXTURE_ERRORS as e:
             results.append({
                 "filename": fixture_file.name,
                 "error": f"Could not parse fixture: {e}"
@@ -33,6 +33,8 @@ setup(
     install_requires=[
         "typer>=0.9.0",
         "rich>=13.0.0",
+        "blake3>=0.3.0",
+        "orjson>=3.8.0",
     ],
     entry_points={
         "console_scripts": [
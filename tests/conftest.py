@@ -0,0 +1,25 @@
+"""Shared pytest fixtures for FixtureGPT tests."""
+
+import pytest
+
+
+@pytest.fixture
+def fixtures_dir(tmp_path, monkeypatch):
+    """Run the test from its own temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def fixturegpt_env():
+    """Set FIXTUREGPT_* variables for one test, re-reading the configuration on set and teardown."""
+    from fixturegpt import refresh_config
+    
+    with pytest.MonkeyPatch.context() as mp:
+        def setenv(**values: str) -> None:
+            for name, value in values.items():
+                mp.setenv(name, value)
+            refresh_config()
+        
+        yield setenv
+    refresh_config()
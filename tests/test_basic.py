@@ -1,12 +1,11 @@
 """Basic tests for FixtureGPT functionality."""
 
 import os
-import tempfile
-import shutil
 from pathlib import Path
 import pytest
 
-from fixturegpt import snapshot
+from fixturegpt import snapshot, snapshot_async, cloud_config, prefetch_fixtures, use_mode
+from fixturegpt.main import diff_fixture, get_fixture_stats
 
 
 def test_snapshot_import():
@@ -14,42 +13,152 @@ def test_snapshot_import():
     assert callable(snapshot)
 
 
-def test_snapshot_record_mode():
+def test_log_level_accepts_names_and_numbers():
+    """Test that FIXTUREGPT_LOG values are parsed without raising."""
+    from fixturegpt.main import _parse_log_level
+    
+    assert _parse_log_level("debug") == 10
+    assert _parse_log_level("WARNING") == 30
+    assert _parse_log_level("10") == 10
+    assert _parse_log_level("verbose") is None
+
+
+def test_invalid_mem_cache_size_falls_back_to_default(fixturegpt_env):
+    """Test that a non-integer FIXTUREGPT_MEM_CACHE doesn't break configuration."""
+    from fixturegpt.main import _config
+    
+    fixturegpt_env(FIXTUREGPT_MEM_CACHE="abc")
+    assert _config().mem_cache_size == 1024
+
+
+def test_snapshot_record_mode(fixtures_dir):
     """Test snapshot function in record mode."""
-    # Create a temporary directory for fixtures
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Change to temp directory
-        original_cwd = os.getcwd()
-        os.chdir(temp_dir)
-        
-        try:
-            # Set record mode
-            os.environ["FIXTUREGPT_MODE"] = "record"
-            
-            def dummy_function(x, y=10):
-                return {"result": x + y}
-            
-            # Call snapshot
-            result = snapshot("test_func", dummy_function, 5, y=15)
-            
-            # Check result
-            assert result == {"result": 20}
-            
-            # Check fixture was created
-            fixtures_dir = Path("./fixtures")
-            assert fixtures_dir.exists()
-            
-            fixture_files = list(fixtures_dir.glob("test_func-*.json"))
-            assert len(fixture_files) == 1
-            
-        finally:
-            # Cleanup
-            os.chdir(original_cwd)
-            if "FIXTUREGPT_MODE" in os.environ:
-                del os.environ["FIXTUREGPT_MODE"]
+    try:
+        # Set record mode
+        os.environ["FIXTUREGPT_MODE"] = "record"
+        
+        def dummy_function(x, y=10):
+            return {"result": x + y}
+        
+        # Call snapshot
+        result = snapshot("test_func", dummy_function, 5, y=15)
+        
+        # Check result
+        assert result == {"result": 20}
+        
+        # Check fixture was created
+        fixtures_path = Path("./fixtures")
+        assert fixtures_path.exists()
+        
+        with os.scandir(fixtures_path) as entries:
+            fixture_files = [
+                entry.name for entry in entries
+                if entry.name.startswith("test_func-") and entry.name.endswith(".json")
+            ]
+        assert len(fixture_files) == 1
+        
+    finally:
+        if "FIXTUREGPT_MODE" in os.environ:
+            del os.environ["FIXTUREGPT_MODE"]
+
+
+def test_snapshot_replays_legacy_sha256_fixture(fixtures_dir):
+    """Test that fixtures recorded with the old SHA256 keys still replay."""
+    import json
+    import hashlib
+    
+    try:
+        input_str = json.dumps({"args": [3], "kwargs": {}}, sort_keys=True, default=str)
+        legacy_hash = hashlib.sha256(input_str.encode()).hexdigest()[:16]
+        fixtures_path = Path("./fixtures")
+        fixtures_path.mkdir()
+        with open(fixtures_path / f"legacy_func-{legacy_hash}.json", "w") as f:
+            json.dump({"name": "legacy_func", "args": [3], "kwargs": {}, "response": "cached"}, f)
+        
+        os.environ["FIXTUREGPT_MODE"] = "replay"
+        result = snapshot("legacy_func", lambda x: "live", 3)
+        assert result == "cached"
+        
+    finally:
+        if "FIXTUREGPT_MODE" in os.environ:
+            del os.environ["FIXTUREGPT_MODE"]
+
+
+def test_prefetch_fixtures_stages_replay(fixtures_dir):
+    """Test that prefetched fixtures are served on replay."""
+    try:
+        os.environ["FIXTUREGPT_MODE"] = "record"
+        snapshot("prefetch_func", lambda x: {"value": x}, 7)
+        
+        assert prefetch_fixtures(["prefetch_func", "missing_func"]) == 1
+        assert prefetch_fixtures() == 1
+        
+        os.environ["FIXTUREGPT_MODE"] = "replay"
+        result = snapshot("prefetch_func", lambda x: {"value": -1}, 7)
+        assert result == {"value": 7}
+        
+    finally:
+        if "FIXTUREGPT_MODE" in os.environ:
+            del os.environ["FIXTUREGPT_MODE"]
+
+
+def test_snapshot_binary_result_roundtrip(fixtures_dir):
+    """Test that binary results are pickled and replayed losslessly."""
+    try:
+        os.environ["FIXTUREGPT_MODE"] = "record"
+        payload = bytearray(b"\x00\xffbinary" * 1000)
+        snapshot("binary_func", lambda: payload)
+        
+        assert len(list(Path("./fixtures").glob("binary_func-*.pkl"))) == 1
+        
+        os.environ["FIXTUREGPT_MODE"] = "replay"
+        result = snapshot("binary_func", lambda: bytearray())
+        assert result == payload
+        
+    finally:
+        if "FIXTUREGPT_MODE" in os.environ:
+            del os.environ["FIXTUREGPT_MODE"]
+
+
+def test_snapshot_roundtrips_nonfinite_floats_and_namedtuples(fixtures_dir):
+    """Test that NaN, Infinity and namedtuples replay as recorded rather than as null or str."""
+    import math
+    from collections import namedtuple
+    
+    Point = namedtuple("Point", "x y")
+    with use_mode("record"):
+        snapshot("nan_func", lambda: {"score": float("nan"), "bound": float("-inf")})
+        snapshot("scalar_nan_func", lambda: float("nan"))
+        snapshot("point_func", lambda: Point(1, 2))
+    
+    with use_mode("replay"):
+        result = snapshot("nan_func", lambda: None)
+        assert math.isnan(result["score"]) and result["bound"] == float("-inf")
+        assert math.isnan(snapshot("scalar_nan_func", lambda: 0.0))
+        assert snapshot("point_func", lambda: None) == [1, 2]
+
+
+def test_stats_and_diff_never_unpickle(fixtures_dir):
+    """Test that stats and diff report binary fixtures without loading them."""
+    np = pytest.importorskip("numpy")
+    from unittest import mock
+    
+    with use_mode("record"):
+        snapshot("pickled_func", lambda: np.zeros(1 << 17))
+    Path("fixtures/.index.jsonl").unlink()
+    
+    with mock.patch("pickle.loads", side_effect=AssertionError("fixture unpickled")):
+        stats = get_fixture_stats()
+        [result] = diff_fixture("pickled_func")["fixtures"]
+    
+    [fixture] = stats["fixtures"]
+    assert fixture["name"] == "pickled_func"
+    # The .bin sidecar holding the array's 1 MB buffer counts towards the total
+    assert stats["total_size"] > 1 << 20 > fixture["size"]
+    assert "error" in result
 
 
-def test_snapshot_normal_mode():
+def test_snapshot_normal_mode(fixtures_dir):
     """Test snapshot function without mode set (normal execution)."""
     # Ensure no mode is set
     if "FIXTUREGPT_MODE" in os.environ:
@@ -63,7 +172,7 @@ def test_snapshot_normal_mode():
     assert result == 20
 
 
-def test_snapshot_with_args_kwargs():
+def test_snapshot_with_args_kwargs(fixtures_dir):
     """Test snapshot with both args and kwargs."""
     if "FIXTUREGPT_MODE" in os.environ:
         del os.environ["FIXTUREGPT_MODE"]
@@ -76,5 +185,475 @@ def test_snapshot_with_args_kwargs():
     assert result == expected
 
 
+def test_use_mode_overrides_environment(fixtures_dir):
+    """Test that use_mode() takes precedence over FIXTUREGPT_MODE."""
+    try:
+        os.environ["FIXTUREGPT_MODE"] = "record"
+        snapshot("mode_func", lambda x: x + 1, 1)
+        
+        with use_mode("replay"):
+            assert snapshot("mode_func", lambda x: x + 100, 1) == 2
+        
+        # Back to the environment's record mode
+        assert snapshot("mode_func", lambda x: x + 100, 1) == 101
+        
+    finally:
+        if "FIXTUREGPT_MODE" in os.environ:
+            del os.environ["FIXTUREGPT_MODE"]
+
+
+def test_cloud_config_overrides_only_inside_block(fixtures_dir):
+    """Test that cloud_config() settings apply to its with block and nest."""
+    with use_mode("record"), cloud_config(sync_mode="local"):
+        # Cloud-only without an API key has nowhere to save
+        with cloud_config(sync_mode="cloud", api_key=None):
+            snapshot("scoped_func", lambda x: x, 1)
+        assert not Path("fixtures").exists()
+        
+        # Back to the outer block's local mode
+        snapshot("scoped_func", lambda x: x, 1)
+        assert len(list(Path("fixtures").glob("scoped_func-*.json"))) == 1
+
+
+def test_snapshot_async_record_and_replay(fixtures_dir):
+    """Test that snapshot_async() records coroutine results and replays them."""
+    import asyncio
+    
+    async def fetch(x):
+        await asyncio.sleep(0)
+        return {"value": x}
+    
+    async def stale(x):
+        return {"value": -1}
+    
+    with use_mode("record"):
+        assert asyncio.run(snapshot_async("async_func", fetch, 1)) == {"value": 1}
+    assert len(list(Path("fixtures").glob("async_func-*.json"))) == 1
+    
+    with use_mode("replay"):
+        assert asyncio.run(snapshot_async("async_func", stale, 1)) == {"value": 1}
+        # Plain functions are accepted too
+        assert asyncio.run(snapshot_async("async_func", lambda x: {"value": -1}, 1)) == {"value": 1}
+
+
+def test_snapshot_async_concurrent_gather(fixtures_dir):
+    """Test that concurrent snapshot_async() calls each record and replay their own inputs."""
+    import asyncio
+    
+    async def square(x):
+        await asyncio.sleep(0)
+        return x * x
+    
+    async def run_all(fn):
+        return await asyncio.gather(*(snapshot_async("gather_func", fn, i) for i in range(10)))
+    
+    with use_mode("record"):
+        assert asyncio.run(run_all(square)) == [i * i for i in range(10)]
+    assert len(list(Path("fixtures").glob("gather_func-*.json"))) == 10
+    
+    with use_mode("replay"):
+        assert asyncio.run(run_all(lambda x: None)) == [i * i for i in range(10)]
+
+
+def test_snapshot_async_runs_plain_functions_off_the_loop(fixtures_dir):
+    """Test that blocking plain functions passed to snapshot_async() overlap under gather()."""
+    import asyncio
+    import threading
+    
+    # Each call only returns once the other has started, which needs two threads
+    barrier = threading.Barrier(2, timeout=5)
+    
+    def blocking(x):
+        barrier.wait()
+        return x
+    
+    async def run_both():
+        return await asyncio.gather(*(snapshot_async("blocking_func", blocking, i) for i in range(2)))
+    
+    with use_mode("record"):
+        assert asyncio.run(run_both()) == [0, 1]
+
+
+def test_snapshot_async_per_task_mode(fixtures_dir):
+    """Test that use_mode() inside one task doesn't leak into a concurrent task."""
+    import asyncio
+    
+    with use_mode("record"):
+        asyncio.run(snapshot_async("task_mode_func", lambda x: "recorded", 1))
+    
+    async def replaying():
+        with use_mode("replay"):
+            await asyncio.sleep(0)
+            return await snapshot_async("task_mode_func", lambda x: "live", 1)
+    
+    async def recording():
+        with use_mode("record"):
+            await asyncio.sleep(0)
+            return await snapshot_async("task_mode_func", lambda x: "live", 2)
+    
+    async def run_both():
+        return await asyncio.gather(replaying(), recording())
+    
+    assert asyncio.run(run_both()) == ["recorded", "live"]
+
+
+def test_snapshot_async_honors_cloud_config(fixtures_dir):
+    """Test that snapshot_async() sees cloud_config() overrides in its executor calls."""
+    import asyncio
+    
+    async def record():
+        with cloud_config(dedup=True):
+            return await snapshot_async("scoped_async_func", lambda x: {"value": x}, 1)
+    
+    with use_mode("record"), cloud_config(sync_mode="local"):
+        assert asyncio.run(record()) == {"value": 1}
+    
+    # The override only reaches the save if the executor ran in the caller's context
+    assert len(list(Path("fixtures/.objects").rglob("*.json"))) == 1
+
+
+def test_snapshot_msgpack_format_roundtrip(fixtures_dir, fixturegpt_env):
+    """Test that FIXTUREGPT_FORMAT=msgpack fixtures are saved and replayed."""
+    pytest.importorskip("msgpack")
+    fixturegpt_env(FIXTUREGPT_FORMAT="msgpack")
+    
+    with use_mode("record"):
+        snapshot("msgpack_func", lambda x: {"value": x, "tags": ["a", "b"]}, 3)
+    
+    assert len(list(Path("fixtures").glob("msgpack_func-*.msgpack"))) == 1
+    
+    with use_mode("replay"):
+        result = snapshot("msgpack_func", lambda x: {"value": -1}, 3)
+    assert result == {"value": 3, "tags": ["a", "b"]}
+
+
+def test_snapshot_zstd_compression_roundtrip(fixtures_dir, fixturegpt_env):
+    """Test that FIXTUREGPT_COMPRESSION=zstd fixtures are saved and replayed."""
+    pytest.importorskip("zstandard")
+    fixturegpt_env(FIXTUREGPT_COMPRESSION="zstd")
+    
+    with use_mode("record"):
+        snapshot("zstd_func", lambda x: {"text": x * 50}, "compressible ")
+    
+    assert len(list(Path("fixtures").glob("zstd_func-*.json.zst"))) == 1
+    
+    with use_mode("replay"):
+        result = snapshot("zstd_func", lambda x: {"text": ""}, "compressible ")
+    assert result == {"text": "compressible " * 50}
+
+
+def test_zstd_dictionary_trained_per_name(fixtures_dir, fixturegpt_env):
+    """Test that a zstd dictionary is trained and used once enough fixtures exist."""
+    pytest.importorskip("zstandard")
+    fixturegpt_env(FIXTUREGPT_COMPRESSION="zstd")
+    
+    def summarize(prompt):
+        return {"choices": [{"message": {"role": "assistant", "content": f"Summary of {prompt}"}}]}
+    
+    with use_mode("record"):
+        for i in range(20):
+            snapshot("dict_func", summarize, f"prompt {i}")
+    
+    assert Path("fixtures/.dicts/dict_func.zdict").exists()
+    
+    with use_mode("replay"):
+        for i in (0, 19):
+            assert snapshot("dict_func", lambda p: None, f"prompt {i}") == summarize(f"prompt {i}")
+
+
+def test_zstd_dictionary_never_replaced(fixtures_dir, fixturegpt_env):
+    """Test that a recorder with a stale view of .dicts/ doesn't overwrite a trained dictionary."""
+    pytest.importorskip("zstandard")
+    from fixturegpt import main
+    
+    fixturegpt_env(FIXTUREGPT_COMPRESSION="zstd")
+    
+    def summarize(prompt):
+        return {"choices": [{"message": {"role": "assistant", "content": f"Summary of {prompt}"}}]}
+    
+    with use_mode("record"):
+        for i in range(20):
+            snapshot("race_func", summarize, f"prompt {i}")
+    
+    dict_path = Path("fixtures/.dicts/race_func.zdict")
+    trained = dict_path.read_bytes()
+    
+    # Act like a second process that saw no dictionary and is about to train one
+    main._zstd_dicts[main._zstd_dict_path("race_func")] = None
+    main._zstd_saves[main._zstd_dict_path("race_func")] = main._ZSTD_DICT_MIN_SAMPLES - 1
+    with use_mode("record"):
+        snapshot("race_func", summarize, "prompt 20")
+    
+    assert dict_path.read_bytes() == trained
+    main.clear_fixture_cache()
+    with use_mode("replay"):
+        for i in range(21):
+            assert snapshot("race_func", lambda p: None, f"prompt {i}") == summarize(f"prompt {i}")
+
+
+def test_zstd_dictionary_without_hard_links(fixtures_dir, fixturegpt_env):
+    """Test that recording continues without a dictionary where it can't be published."""
+    pytest.importorskip("zstandard")
+    import errno
+    from unittest import mock
+    
+    fixturegpt_env(FIXTUREGPT_COMPRESSION="zstd")
+    
+    def summarize(prompt):
+        return {"choices": [{"message": {"role": "assistant", "content": f"Summary of {prompt}"}}]}
+    
+    with mock.patch("os.link", side_effect=PermissionError(errno.EPERM, "Operation not permitted")), \
+            use_mode("record"):
+        for i in range(20):
+            assert snapshot("nolink_func", summarize, f"prompt {i}") == summarize(f"prompt {i}")
+    
+    assert not Path("fixtures/.dicts/nolink_func.zdict").exists()
+    with use_mode("replay"):
+        assert snapshot("nolink_func", lambda p: None, "prompt 19") == summarize("prompt 19")
+
+
+def test_zstd_dictionary_stays_with_its_directory(fixtures_dir, fixturegpt_env, monkeypatch):
+    """Test that after a chdir fixtures aren't compressed with another directory's dictionary."""
+    pytest.importorskip("zstandard")
+    from fixturegpt import main
+    
+    fixturegpt_env(FIXTUREGPT_COMPRESSION="zstd")
+    
+    def summarize(prompt):
+        return {"choices": [{"message": {"role": "assistant", "content": f"Summary of {prompt}"}}]}
+    
+    for directory in ("a", "b"):
+        (fixtures_dir / directory).mkdir()
+    monkeypatch.chdir(fixtures_dir / "a")
+    with use_mode("record"):
+        for i in range(20):
+            snapshot("moved_func", summarize, f"prompt {i}")
+    assert Path("fixtures/.dicts/moved_func.zdict").exists()
+    
+    monkeypatch.chdir(fixtures_dir / "b")
+    with use_mode("record"):
+        snapshot("moved_func", summarize, "prompt 20")
+    assert not Path("fixtures/.dicts").exists()
+    
+    # Like a fresh process in b, which only has b's files
+    main.clear_fixture_cache()
+    with use_mode("replay"):
+        assert snapshot("moved_func", lambda p: None, "prompt 20") == summarize("prompt 20")
+
+
+def test_record_session_covers_only_its_own_context(fixtures_dir):
+    """Test that other threads' writes don't join a session and late writes still get synced."""
+    import contextvars
+    import threading
+    from unittest import mock
+    from fixturegpt import record_session
+    
+    synced = []
+    with mock.patch("fixturegpt.main._sync_paths", side_effect=lambda paths: synced.append([p.name for p in paths])), \
+            use_mode("record"):
+        with record_session():
+            snapshot("session_func", lambda x: x, 1)
+            context = contextvars.copy_context()
+            worker = threading.Thread(target=snapshot, args=("thread_func", lambda x: x, 2))
+            worker.start()
+            worker.join()
+        
+        # A write in a context copied from the session, finishing after it ended
+        context.run(snapshot, "late_func", lambda x: x, 3)
+    
+    assert len(synced) == 2
+    assert [name.rsplit("-", 1)[0] for name in synced[0]] == ["session_func"]
+    assert [name.rsplit("-", 1)[0] for name in synced[1]] == ["late_func"]
+
+
+def test_fixture_stats_index_tracks_directory(fixtures_dir):
+    """Test that fixture stats come from the index and notice added and removed files."""
+    import json
+    from unittest import mock
+    
+    with use_mode("record"):
+        snapshot("indexed_func", lambda x: x, 1)
+        snapshot("indexed_func", lambda x: x, 2)
+    
+    assert Path("fixtures/.index.jsonl").exists()
+    
+    # Recorded fixtures are served from the index without opening them
+    with mock.patch("fixturegpt.main._read_fixture_file", side_effect=AssertionError("fixture opened")):
+        stats = get_fixture_stats()
+    assert stats["count"] == 2
+    assert {f["name"] for f in stats["fixtures"]} == {"indexed_func"}
+    
+    # A fixture added outside snapshot(), e.g. by a git pull, is picked up
+    pulled = Path("fixtures/pulled-0123456789abcdef.json")
+    pulled.write_text(json.dumps({"name": "pulled", "args": [], "kwargs": {}, "response": 1, "timestamp": "2024-01-01T00:00:00"}))
+    stats = get_fixture_stats()
+    assert stats["count"] == 3
+    assert "pulled" in {f["name"] for f in stats["fixtures"]}
+    assert len(diff_fixture("pulled")["fixtures"]) == 1
+    
+    recorded = Path("fixtures") / next(f["filename"] for f in stats["fixtures"] if f["name"] == "indexed_func")
+    recorded.unlink()
+    pulled.unlink()
+    stats = get_fixture_stats()
+    assert stats["count"] == 1
+    assert stats["fixtures"][0]["name"] == "indexed_func"
+    
+    # Lines that parse but aren't index entries are skipped like torn ones
+    with open("fixtures/.index.jsonl", "a") as f:
+        f.write('{"name": "x"}\n[1, 2]\n"text"\n{"filename": [], "name": "x", "timestamp": "t"}\n{"trunc')
+    stats = get_fixture_stats()
+    assert stats["count"] == 1
+    assert stats["fixtures"][0]["name"] == "indexed_func"
+
+
+def test_dedup_stores_identical_responses_once(fixtures_dir, fixturegpt_env):
+    """Test that FIXTUREGPT_DEDUP shares one stored response between fixtures."""
+    fixturegpt_env(FIXTUREGPT_DEDUP="1")
+    
+    response = {"answer": "same for every prompt"}
+    with use_mode("record"):
+        for prompt in ("a", "b", "c"):
+            snapshot("dedup_func", lambda p: response, prompt)
+    
+    assert len(list(Path("fixtures/.objects").rglob("*.json"))) == 1
+    
+    with use_mode("replay"):
+        assert snapshot("dedup_func", lambda p: None, "b") == response
+
+
+class _RecordingSession:
+    """Stand-in for requests.Session that records posts and answers them locally."""
+    
+    def __init__(self, batch_status=201):
+        self.batch_status = batch_status
+        self.posts = []
+    
+    def post(self, url, data=None, headers=None, timeout=None):
+        import json
+        from types import SimpleNamespace
+        self.posts.append((url, json.loads(data)))
+        status = self.batch_status if url.endswith("/batch") else 201
+        return SimpleNamespace(status_code=status, text="")
+
+
+def test_cloud_uploads_are_batched_and_flushed(fixtures_dir):
+    """Test that queued uploads go out in batches of 32 and flush_cloud_sync() drains them."""
+    from unittest import mock
+    from fixturegpt import flush_cloud_sync
+    from fixturegpt import main
+    
+    session = _RecordingSession()
+    with mock.patch("fixturegpt.main._get_session", return_value=session), \
+            cloud_config(api_key="test-key", sync_mode="cloud", api_url="http://batch.test"), \
+            use_mode("record"):
+        # Holding the queue's lock keeps the worker from starting a batch until all are queued
+        with main._upload_cond:
+            for i in range(40):
+                snapshot("upload_func", lambda x: x, i)
+        assert flush_cloud_sync(timeout=5)
+        assert not main._upload_queue
+    
+    assert [(url, len(body["fixtures"])) for url, body in session.posts] == [
+        ("http://batch.test/api/fixtures/batch", 32),
+        ("http://batch.test/api/fixtures/batch", 8),
+    ]
+
+
+def test_cloud_upload_is_encoded_when_queued(fixtures_dir):
+    """Test that changes the caller makes to a result after snapshot() aren't uploaded."""
+    from unittest import mock
+    from fixturegpt import flush_cloud_sync
+    from fixturegpt import main
+    
+    session = _RecordingSession()
+    with mock.patch("fixturegpt.main._get_session", return_value=session), \
+            cloud_config(api_key="test-key", sync_mode="cloud", api_url="http://mutate.test"), \
+            use_mode("record"):
+        with main._upload_cond:
+            result = snapshot("mutated_func", lambda: {"answer": "recorded"})
+            result["answer"] = "MUTATED"
+        assert flush_cloud_sync(timeout=5)
+    
+    [(_, body)] = session.posts
+    assert body["fixtures"][0]["response"] == {"answer": "recorded"}
+
+
+def test_cloud_uploads_fall_back_to_single_posts(fixtures_dir):
+    """Test that a 404 from the batch route switches to single posts and is remembered."""
+    from unittest import mock
+    from fixturegpt import flush_cloud_sync
+    from fixturegpt import main
+    
+    api_url = "http://nobatch.test"
+    session = _RecordingSession(batch_status=404)
+    try:
+        with mock.patch("fixturegpt.main._get_session", return_value=session), \
+                cloud_config(api_key="test-key", sync_mode="cloud", api_url=api_url), \
+                use_mode("record"):
+            with main._upload_cond:
+                for i in range(3):
+                    snapshot("single_func", lambda x: x, i)
+            assert flush_cloud_sync(timeout=5)
+            
+            snapshot("single_func", lambda x: x, 3)
+            assert flush_cloud_sync(timeout=5)
+        
+        urls = [url for url, _ in session.posts]
+        assert urls == [f"{api_url}/api/fixtures/batch"] + [f"{api_url}/api/fixtures"] * 4
+        assert [body["args"] for _, body in session.posts[1:]] == [[0], [1], [2], [3]]
+        
+    finally:
+        main._no_batch_route.discard(api_url)
+
+
+class _FixtureServer:
+    """Stand-in for requests.Session that answers fixture searches from per-key fixture lists."""
+    
+    def __init__(self, fixtures_by_key):
+        self.fixtures_by_key = fixtures_by_key
+        self.gets = []
+    
+    def get(self, url, params=None, headers=None, timeout=None):
+        from types import SimpleNamespace
+        api_key = headers["Authorization"].split(" ", 1)[1]
+        self.gets.append((api_key, params))
+        fixtures = self.fixtures_by_key.get(api_key, [])
+        return SimpleNamespace(status_code=200, json=lambda: {"fixtures": fixtures})
+    
+    def post(self, url, data=None, headers=None, timeout=None):
+        from types import SimpleNamespace
+        return SimpleNamespace(status_code=201, text="")
+
+
+def test_cloud_replay_matches_inputs_and_caches_per_key(fixtures_dir):
+    """Test cloud lookups by hash, the scan of name matches, and the per-API-key cache."""
+    from unittest import mock
+    from fixturegpt import flush_cloud_sync
+    
+    def fixture(args, response):
+        return {"name": "cloud_func", "args": args, "kwargs": {}, "response": response}
+    
+    server = _FixtureServer({
+        # Servers that ignore the hash filter return every fixture with the name
+        "team-a": [fixture([1], "a1"), fixture([2], "a2")],
+        "team-b": [fixture([2], "b2")],
+    })
+    with mock.patch("fixturegpt.main._get_session", return_value=server), \
+            cloud_config(sync_mode="cloud", api_url="http://cloud.test"), \
+            use_mode("replay"):
+        with cloud_config(api_key="team-a"):
+            assert snapshot("cloud_func", lambda x: "live", 2) == "a2"
+            assert snapshot("cloud_func", lambda x: "live", 2) == "a2"
+        with cloud_config(api_key="team-b"):
+            assert snapshot("cloud_func", lambda x: "live", 2) == "b2"
+            # No match falls back to a live call, which is uploaded
+            assert snapshot("cloud_func", lambda x: "live", 3) == "live"
+        assert flush_cloud_sync(timeout=5)
+    
+    # The repeat for team A is served from the cache; team B gets its own lookup
+    assert [key for key, _ in server.gets] == ["team-a", "team-b", "team-b"]
+    assert server.gets[0][1]["search"] == "cloud_func"
+
+
 if __name__ == "__main__":
-    pytest.main([__file__]) 
\ No newline at end of file
+    pytest.main([__file__])